@@ -0,0 +1,121 @@
+"""Assembly statistics over a stream of contigs.
+
+Lengths are kept as a histogram (length -> count), so millions of contigs
+cost memory proportional to the number of distinct lengths, and sequences
+are never held. With a reference genome, genome fraction and duplication
+ratio are estimated from shared k-mers (see reference_kmers.py):
+
+    python assembly_stats.py out/data1-k25.contigs.fasta --reference genome.fasta
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import argparse
+import json
+
+from utils import iter_reads
+
+
+class LengthStats:
+    """Streaming Nx / Lx / NGx / auN over contig lengths."""
+    histogram: Dict[int, int]
+    count: int
+    total: int
+    sum_squares: int
+
+    def __init__(self, lengths: Iterable[int] = ()) -> None:
+        self.histogram = {}
+        self.count = 0
+        self.total = 0
+        self.sum_squares = 0
+        self.update(lengths)
+
+    def add(self, length: int) -> None:
+        self.histogram[length] = self.histogram.get(length, 0) + 1
+        self.count += 1
+        self.total += length
+        self.sum_squares += length * length
+
+    def update(self, lengths: Iterable[int]) -> None:
+        for length in lengths:
+            self.add(length)
+
+    def thresholds(self, targets: List[int]) -> List[Tuple[int, int]]:
+        """(length, number of contigs) at which the cumulative length of the
+        longest contigs first reaches each target; (0, 0) if it never does.
+        """
+        results: List[Tuple[int, int]] = [(0, 0)] * len(targets)
+        order: List[int] = sorted(range(len(targets)), key=targets.__getitem__)
+        cumulative: int = 0
+        contigs: int = 0
+        i: int = 0
+        for length in sorted(self.histogram, reverse=True):
+            n: int = self.histogram[length]
+            cumulative += length * n
+            contigs += n
+            while i < len(order) and cumulative >= targets[order[i]]:
+                # only as many contigs of this length as the target needs
+                over: int = (cumulative - targets[order[i]]) // length if length else 0
+                results[order[i]] = (length, contigs - over)
+                i += 1
+            if i == len(order):
+                break
+        return results
+
+    def summary(self, genome_size: Optional[int] = None) -> Dict[str, Any]:
+        """N50, N90, L50, L90, auN and totals; NG50/NG90/LG50 with genome_size."""
+        stats: Dict[str, Any] = {"contigs": self.count, "total_length": self.total,
+                                 "largest": max(self.histogram, default=0)}
+        if not self.count:
+            return stats
+        # ceil(total * x / 100), the smallest cumulative length that reaches x%
+        targets: List[int] = [-(-self.total * 50 // 100), -(-self.total * 90 // 100)]
+        (n50, l50), (n90, l90) = self.thresholds(targets)
+        stats.update(N50=n50, N90=n90, L50=l50, L90=l90,
+                     auN=round(self.sum_squares / self.total, 1) if self.total else 0.0)
+        if genome_size:
+            (ng50, lg50), (ng90, _) = self.thresholds([-(-genome_size * 50 // 100),
+                                                       -(-genome_size * 90 // 100)])
+            stats.update(NG50=ng50 or "NA", NG90=ng90 or "NA", LG50=lg50 or "NA")
+        return stats
+
+
+def assembly_stats(contigs: Iterable[str], reference: Optional[str] = None, k: int = 25,
+                   genome_size: Optional[int] = None) -> Dict[str, Any]:
+    """Length statistics of contigs and, given a reference FASTA, genome fraction
+    and duplication ratio. contigs is consumed once, as a stream.
+    """
+    lengths: LengthStats = LengthStats()
+
+    def measured(seqs: Iterable[str]) -> Iterable[str]:
+        for seq in seqs:
+            lengths.add(len(seq))
+            yield seq
+
+    if reference is None:
+        lengths.update(len(seq) for seq in contigs)
+        return lengths.summary(genome_size)
+    from reference_kmers import ReferenceKmers
+    ref: ReferenceKmers = ReferenceKmers(reference, k)
+    ref.add_all(measured(contigs))
+    if genome_size is None:
+        # distinct canonical k-mers ~ genome length for a non-repetitive genome
+        genome_size = len(ref.kmers) + k - 1
+    stats: Dict[str, Any] = lengths.summary(genome_size)
+    stats["genome_fraction"] = round(ref.genome_fraction(), 3)
+    stats["duplication_ratio"] = round(ref.duplication_ratio(), 3)
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="N50/N90/L50/auN and reference k-mer metrics.")
+    parser.add_argument("contigs", nargs="+", help="FASTA/FASTQ files, optionally gzipped")
+    parser.add_argument("--reference", help="reference genome FASTA")
+    parser.add_argument("--genome-size", type=int, help="for NG50/NG90 (default: from --reference)")
+    parser.add_argument("-k", type=int, default=25, help="k-mer size for --reference (default: 25)")
+    args = parser.parse_args()
+    for path in args.contigs:
+        stats = assembly_stats(iter_reads(path), args.reference, args.k, args.genome_size)
+        print(json.dumps({"file": path, **stats}))
+
+
+if __name__ == "__main__":
+    main()
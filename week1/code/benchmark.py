@@ -0,0 +1,239 @@
+"""Benchmarks for FASTA parsing and the graph backends.
+
+Every (dataset, backend) pair is timed over --repeats runs for graph
+build, one full depth traversal, and extraction of 20 contigs; FASTA
+parsing is timed over the same number of runs, once per dataset rather
+than per backend. Graph memory is measured in a separate
+untimed pass with tracemalloc. Results can be saved as a JSON baseline
+and later runs compared against it:
+
+    python benchmark.py ../data --save-baseline bench.json
+    python benchmark.py ../data --compare bench.json
+
+--seqops also times the reverse-complement implementations on every
+dataset's reads.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import dbg
+import dbg_array
+import dbg_canonical
+import dbg_kmer_as_int
+import dbg_kmer_as_key
+import seqops
+from utils import discover_reads, iter_reads, read_fasta
+
+BACKENDS: Dict[str, Callable[..., Any]] = {
+    "dbg": dbg.DBG,                   # integer ids, string k-mers
+    "key": dbg_kmer_as_key.DBG,       # string-keyed nodes
+    "int": dbg_kmer_as_int.DBG,       # 2-bit packed keys
+    "array": dbg_array.DBG,           # typed arrays + CSR
+    "canonical": dbg_canonical.DBG,   # one node per k-mer / RC pair
+}
+CASES: List[str] = ["build", "traverse", "contigs"]
+K: int = 25
+N_CONTIGS: int = 20
+
+
+def synthetic_reads(genome_size: int, coverage: float, error_rate: float,
+                    read_length: int = 100, seed: int = 0) -> List[str]:
+    """Both mates of simulated read pairs from a random genome, with substitutions."""
+    import numpy as np
+    import simulate
+    rng = np.random.default_rng(seed)
+    profile = simulate.ReadProfile({"short_read_length": read_length,
+                                    "short_read_error_rate": error_rate})
+    genome = simulate.random_genome(genome_size, rng)
+    n_pairs: int = int(genome_size * coverage / (2 * read_length))
+    reads: List[str] = []
+    for first, second in simulate.short_pairs(genome, n_pairs, profile, rng):
+        for mates in (first, second):
+            seqs: str = simulate.decode(mates)
+            reads.extend(seqs[i:i + read_length] for i in range(0, len(seqs), read_length))
+    return reads
+
+
+def _timed(fn: Callable[[], Any]) -> Tuple[float, Any]:
+    gc.collect()
+    start: float = time.perf_counter()
+    result: Any = fn()
+    return time.perf_counter() - start, result
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "runs": len(samples),
+    }
+
+
+def _rc_generator(seq: str) -> str:
+    # the former dbg.reverse_complement
+    complement: Dict[str, str] = {'A': 'T', 'T': 'A', 'G': 'C', 'C': 'G'}
+    return ''.join(complement[c] for c in reversed(seq))
+
+
+RC_IMPLEMENTATIONS: Dict[str, Callable[[List[str]], List[str]]] = {
+    "generator": lambda reads: [_rc_generator(r) for r in reads],
+    # the Codon-compatible version dbg_kmer_as_key keeps
+    "list_loop": lambda reads: [dbg_kmer_as_key.reverse_complement(r) for r in reads],
+    "translate": lambda reads: [seqops.reverse_complement(r) for r in reads],
+    "numpy_batch": seqops.reverse_complement_batch,
+}
+
+
+def bench_reverse_complement(reads: List[str], repeats: int) -> Dict[str, Dict[str, float]]:
+    """Time every RC implementation over all reads; they must agree."""
+    expected: List[str] = RC_IMPLEMENTATIONS["translate"](reads)
+    results: Dict[str, Dict[str, float]] = {}
+    for name, rc in RC_IMPLEMENTATIONS.items():
+        assert rc(reads) == expected, f"{name} reverse complement differs"
+        results[name] = summarize([_timed(lambda: rc(reads))[0] for _ in range(repeats)])
+    return results
+
+
+def bench_parse(files: List[str], repeats: int) -> Dict[str, float]:
+    def parse() -> int:
+        return sum(1 for path in files for _ in iter_reads(path))
+    return summarize([_timed(parse)[0] for _ in range(repeats)])
+
+
+def bench_backend(backend: str, data_list: List[List[str]], repeats: int) -> Dict[str, Any]:
+    """Build, traverse and contig timings for one backend, plus its graph memory."""
+    cls = BACKENDS[backend]
+    samples: Dict[str, List[float]] = {case: [] for case in CASES}
+    for _ in range(repeats):
+        seconds, graph = _timed(lambda: cls(K, data_list))
+        samples["build"].append(seconds)
+        # a fresh graph has no cached depths, so this is one full traversal
+        samples["traverse"].append(_timed(graph._get_longest_path)[0])
+        samples["contigs"].append(_timed(lambda: graph.get_top_contigs(N_CONTIGS))[0])
+        del graph
+    result: Dict[str, Any] = {case: summarize(samples[case]) for case in CASES}
+    gc.collect()
+    tracemalloc.start()
+    graph = cls(K, data_list)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del graph
+    result["memory"] = {"graph_mb": round(current / 2**20, 1), "build_peak_mb": round(peak / 2**20, 1)}
+    return result
+
+
+def load_datasets(data_root: Optional[str], names: Optional[List[str]],
+                  synthetic: List[Tuple[int, float, float]]) -> Dict[str, Tuple[List[str], List[List[str]]]]:
+    """name -> (read files, reads per library) for bundled and synthetic datasets."""
+    datasets: Dict[str, Tuple[List[str], List[List[str]]]] = {}
+    if data_root:
+        for name in names or sorted(os.listdir(data_root)):
+            path: str = f"{data_root}/{name}"
+            if not os.path.isdir(path):
+                continue
+            libraries: Dict[str, str] = discover_reads(path)
+            files: List[str] = [f"{path}/{lib}" for lib in libraries.values()]
+            datasets[name] = files, [read_fasta(path, lib) for lib in libraries.values()]
+    for genome_size, coverage, error_rate in synthetic:
+        name = f"synthetic-{genome_size}-{coverage:g}x-e{error_rate:g}"
+        datasets[name] = [], [synthetic_reads(genome_size, coverage, error_rate)]
+    return datasets
+
+
+def run(datasets: Dict[str, Tuple[List[str], List[List[str]]]], backends: List[str],
+        repeats: int, rc: bool = False) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for name, (files, data_list) in datasets.items():
+        if files:
+            results[f"{name}/parse"] = bench_parse(files, repeats)
+            print(f"{name}/parse: {results[f'{name}/parse']['median']:.3f}s", flush=True)
+        if rc:
+            timings = bench_reverse_complement([r for data in data_list for r in data], repeats)
+            base: float = timings["generator"]["median"]
+            for impl, summary in timings.items():
+                results[f"{name}/rc/{impl}"] = summary
+            print(f"{name}/rc: " + ", ".join(f"{impl} {s['median']:.3f}s ({base / s['median']:.1f}x)"
+                                             for impl, s in timings.items()), flush=True)
+        for backend in backends:
+            result = bench_backend(backend, data_list, repeats)
+            for case in CASES:
+                results[f"{name}/{backend}/{case}"] = result[case]
+            results[f"{name}/{backend}/memory"] = result["memory"]
+            print(f"{name}/{backend}: " + ", ".join(f"{case} {result[case]['median']:.3f}s"
+                                                    for case in CASES)
+                  + f", graph {result['memory']['graph_mb']} MB", flush=True)
+    return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Keys whose median time (or graph memory) grew by more than tolerance."""
+    regressions: List[str] = []
+    for key, base in baseline.get("results", {}).items():
+        now: Optional[Dict[str, Any]] = results.get(key)
+        if now is None:
+            continue
+        metric: str = "graph_mb" if key.endswith("/memory") else "median"
+        if base[metric] > 0 and now[metric] > base[metric] * (1 + tolerance):
+            regressions.append(f"{key}: {metric} {base[metric]:.3f} -> {now[metric]:.3f} "
+                               f"(+{100 * (now[metric] / base[metric] - 1):.0f}%)")
+    return regressions
+
+
+def _synthetic_spec(value: str) -> Tuple[int, float, float]:
+    size, coverage, error_rate = value.split(",")
+    return int(size), float(coverage), float(error_rate)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark FASTA parsing and DBG backends.")
+    parser.add_argument("data_root", nargs="?", help="directory containing data1..data4")
+    parser.add_argument("--datasets", type=lambda v: v.split(","),
+                        help="comma-separated subset of the datasets under data_root")
+    parser.add_argument("--synthetic", type=_synthetic_spec, action="append", default=[],
+                        metavar="SIZE,COVERAGE,ERROR",
+                        help="also benchmark a simulated genome, e.g. 20000,30,0.01 (repeatable)")
+    parser.add_argument("--backends", type=lambda v: v.split(","), default=["dbg", "key"],
+                        help=f"comma-separated, from {','.join(BACKENDS)} (default: dbg,key)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seqops", action="store_true",
+                        help="also benchmark the reverse-complement implementations")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write results to PATH as JSON")
+    parser.add_argument("--compare", metavar="PATH",
+                        help="compare against a baseline and exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed slowdown before a result counts as a regression (default: 0.2)")
+    args = parser.parse_args()
+    if not args.data_root and not args.synthetic:
+        parser.error("give a data_root and/or --synthetic datasets")
+    unknown: List[str] = [b for b in args.backends if b not in BACKENDS]
+    if unknown:
+        parser.error(f"unknown backends: {', '.join(unknown)}")
+
+    datasets = load_datasets(args.data_root, args.datasets, args.synthetic)
+    results = run(datasets, args.backends, args.repeats, args.seqops)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"python": sys.version.split()[0], "machine": platform.machine(),
+                       "repeats": args.repeats, "results": results}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
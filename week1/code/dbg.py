@@ -1,8 +1,7 @@
-from typing import List, Dict, Optional, Set
+from typing import Iterator, List, Dict, Optional, Set
+
+from seqops import reverse_complement
 
-def reverse_complement(seq: str) -> str:
-    complement: Dict[str, str] = {'A': 'T', 'T': 'A', 'G': 'C', 'C': 'G'}
-    return ''.join(complement[c] for c in reversed(seq))
 
 class Node:
     kmer: str
@@ -40,6 +39,20 @@ class Node:
     def remove_children(self, target: Set[int]) -> None:
         self._children -= target
 
+class _Frame:
+    idx: int
+    children: List[int]
+    next: int
+    max_depth: int
+    max_child: Optional[int]
+
+    def __init__(self, idx: int, children: List[int]) -> None:
+        self.idx = idx
+        self.children = children
+        self.next = 0
+        self.max_depth = 0
+        self.max_child = None
+
 class DBG:
     k: int
     nodes: Dict[int, Node]
@@ -98,18 +111,35 @@ class DBG:
         return children
 
     def _get_depth(self, idx: int) -> int:
+        # Explicit-stack DFS mirroring the recursive definition; a child still
+        # on the stack (a cycle) contributes depth 0.
         node = self.nodes[idx]
-        if not node.visited:
-            node.visited = True
-            max_depth = 0
-            max_child = None
-            for child in self._get_sorted_children(idx):
-                d = self._get_depth(child)
-                if d > max_depth:
-                    max_depth = d
-                    max_child = child
-            node.depth = max_depth + 1
-            node.max_depth_child = max_child
+        if node.visited:
+            return node.depth
+        node.visited = True
+        stack = [_Frame(idx, self._get_sorted_children(idx))]
+        while stack:
+            frame = stack[-1]
+            if frame.next < len(frame.children):
+                child = frame.children[frame.next]
+                frame.next += 1
+                child_node = self.nodes[child]
+                if not child_node.visited:
+                    child_node.visited = True
+                    stack.append(_Frame(child, self._get_sorted_children(child)))
+                elif child_node.depth > frame.max_depth:
+                    frame.max_depth = child_node.depth
+                    frame.max_child = child
+                continue
+            stack.pop()
+            done = self.nodes[frame.idx]
+            done.depth = frame.max_depth + 1
+            done.max_depth_child = frame.max_child
+            if stack:
+                parent = stack[-1]
+                if done.depth > parent.max_depth:
+                    parent.max_depth = done.depth
+                    parent.max_child = frame.idx
         return node.depth
 
     def _reset(self) -> None:
@@ -151,3 +181,18 @@ class DBG:
         contig = self._concat_path(path)
         self._delete_path(path)
         return contig
+
+    def get_top_contigs(self, n: int) -> List[str]:
+        return list(self.iter_top_contigs(n))
+
+    def iter_top_contigs(self, n: int) -> Iterator[str]:
+        """Yield the first n contigs of repeated get_longest_contig() calls.
+
+        This engine recomputes every depth per contig, so there is no
+        incremental state to reuse.
+        """
+        for _ in range(n):
+            contig = self.get_longest_contig()
+            if contig is None:
+                break
+            yield contig
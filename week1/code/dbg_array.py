@@ -0,0 +1,312 @@
+from array import array
+from collections import Counter
+import heapq
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from dbg_kmer_as_int import DECODE, MAX_K, decode_kmer, iter_read_codes
+from dbg_kmer_as_key import StepTimer
+
+
+def _csr(pairs: List[int], n: int) -> Tuple[array, array]:
+    """CSR (offsets, targets) from sorted (source << 32 | target) pairs."""
+    offsets: array = array('q', bytes(8 * (n + 1)))
+    targets: array = array('i', bytes(4 * len(pairs)))
+    for j, pair in enumerate(pairs):
+        offsets[(pair >> 32) + 1] += 1
+        targets[j] = pair & 0xFFFFFFFF
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+    return offsets, targets
+
+
+class DBG:
+    """Array-backed DBG: one integer id per k-mer, no per-node objects.
+
+    Ids are assigned in the same first-seen order as dbg.py's kmer2idx.
+    Counts, depths, best children and flags live in parallel typed arrays
+    indexed by id, and adjacency (children and parents) is stored in CSR
+    form, with each node's children pre-sorted by count.
+    """
+    k: int
+    n: int
+    kmers: array
+    counts: array
+    child_offsets: array
+    children: array
+    parent_offsets: array
+    parents: array
+    depth: array
+    max_depth_child: array
+    visited: bytearray
+    alive: bytearray
+    # 1 for nodes that can reach a cycle, as of the last full depth reset
+    cyclic: bytearray
+    _depths_valid: bool
+
+    def __init__(self, k: int, data_list: List[Iterable[str]]) -> None:
+        self.k = k
+        self._check(data_list)
+        self._build(data_list)
+        self._depths_valid = False
+
+    def _check(self, data_list: List[Iterable[str]]) -> None:
+        assert len(data_list) > 0, "data_list must not be empty"
+        assert self.k <= MAX_K, f"k-mer size must be at most {MAX_K}"
+        for seq in data_list[0]:
+            assert self.k <= len(seq), "k-mer size larger than read length"
+            break
+
+    def _build(self, data_list: List[Iterable[str]]) -> None:
+        kmer2idx: Dict[int, int] = {}
+        occurrences: Counter = Counter()
+        edges: Set[int] = set()
+        for data in data_list:
+            for fwd, rev in iter_read_codes(data, self.k):
+                rev.reverse()
+                # ids are handed out in the order _build of the object engines
+                # visits k-mers: forward pair, then RC pair, arc by arc
+                ids: List[int] = [kmer2idx.setdefault(code, len(kmer2idx))
+                                  for code in chain.from_iterable(zip(fwd, fwd[1:], rev, rev[1:]))]
+                occurrences.update(ids)
+                edges.update([(a << 32) | b for a, b in zip(ids[::2], ids[1::2])])
+        kmers: array = array('Q', kmer2idx)
+        del kmer2idx
+        counts: array = array('i', map(occurrences.__getitem__, range(len(kmers))))
+        del occurrences
+
+        self.n = n = len(kmers)
+        self.kmers = kmers
+        self.counts = counts
+        self.child_offsets, self.children = _csr(sorted(edges), n)
+        self.parent_offsets, self.parents = _csr(
+            sorted(((e & 0xFFFFFFFF) << 32) | (e >> 32) for e in edges), n)
+        del edges
+        # visit children by count, highest first; ties keep id order
+        offsets: array = self.child_offsets
+        for idx in range(n):
+            start, end = offsets[idx], offsets[idx + 1]
+            if end - start > 1:
+                self.children[start:end] = array('i', sorted(self.children[start:end],
+                                                             key=lambda c: -counts[c]))
+        self.depth = array('i', bytes(4 * n))
+        self.max_depth_child = array('i', [-1]) * n
+        self.visited = bytearray(n)
+        self.alive = bytearray(b'\x01') * n
+        self.cyclic = bytearray(n)
+
+    def _reset(self) -> None:
+        # deleted nodes stay marked visited so the DFS never starts from them
+        self.visited = bytearray(1 - a for a in self.alive)
+        self.depth = array('i', bytes(4 * self.n))
+        self.max_depth_child = array('i', [-1]) * self.n
+
+    def _get_depth(self, idx: int) -> int:
+        # Explicit-stack DFS with the same semantics as the object engines:
+        # children are tried in count order, the first strictly deeper one
+        # wins, and a child still on the stack contributes depth 0.
+        visited, alive, depth, best = self.visited, self.alive, self.depth, self.max_depth_child
+        offsets, children = self.child_offsets, self.children
+        if visited[idx]:
+            return depth[idx]
+        visited[idx] = 1
+        # frame: [node, next child position, end position, best depth, best child]
+        stack: List[List[int]] = [[idx, offsets[idx], offsets[idx + 1], 0, -1]]
+        while stack:
+            frame: List[int] = stack[-1]
+            if frame[1] < frame[2]:
+                child: int = children[frame[1]]
+                frame[1] += 1
+                if not alive[child]:
+                    continue
+                if not visited[child]:
+                    visited[child] = 1
+                    stack.append([child, offsets[child], offsets[child + 1], 0, -1])
+                elif depth[child] > frame[3]:
+                    frame[3], frame[4] = depth[child], child
+                continue
+            stack.pop()
+            node: int = frame[0]
+            depth[node] = frame[3] + 1
+            best[node] = frame[4]
+            if stack:
+                parent: List[int] = stack[-1]
+                if depth[node] > parent[3]:
+                    parent[3], parent[4] = depth[node], node
+        return depth[idx]
+
+    def _prepare_traversal(self) -> None:
+        if not self._depths_valid:
+            self._reset()
+            self.cyclic = self._reaching_cycles()
+            self._depths_valid = True
+
+    def _reaching_cycles(self) -> bytearray:
+        """Flags of the live nodes from which a cycle can be reached (see the object engines)."""
+        alive, children, parents = self.alive, self.children, self.parents
+        child_offsets, parent_offsets = self.child_offsets, self.parent_offsets
+        out_degree: array = array('i', bytes(4 * self.n))
+        for idx in range(self.n):
+            if alive[idx]:
+                out_degree[idx] = sum(alive[c] for c in children[child_offsets[idx]:child_offsets[idx + 1]])
+        stack: List[int] = [idx for idx in range(self.n) if alive[idx] and out_degree[idx] == 0]
+        while stack:
+            idx: int = stack.pop()
+            for parent in parents[parent_offsets[idx]:parent_offsets[idx + 1]]:
+                if alive[parent]:
+                    out_degree[parent] -= 1
+                    if out_degree[parent] == 0:
+                        stack.append(parent)
+        return bytearray(1 if degree > 0 else 0 for degree in out_degree)
+
+    def _fill_depths(self) -> None:
+        idx: int = self.visited.find(0)
+        while idx != -1:
+            self._get_depth(idx)
+            idx = self.visited.find(0, idx + 1)
+
+    def _deepest(self) -> Optional[int]:
+        """Fill in all depths and return the start of the deepest path."""
+        self._fill_depths()
+        if self.n == 0:
+            return None
+        # deleted nodes have depth 0, and max() keeps the lowest id on ties
+        max_idx: int = max(range(self.n), key=self.depth.__getitem__)
+        return max_idx if self.depth[max_idx] > 0 else None
+
+    def _trace_path(self, start: Optional[int]) -> List[int]:
+        path: List[int] = []
+        idx: int = -1 if start is None else start
+        while idx != -1:
+            path.append(idx)
+            idx = self.max_depth_child[idx]
+        return path
+
+    def _get_longest_path(self) -> List[int]:
+        return self._trace_path(self._deepest())
+
+    def _delete_path(self, path: List[int]) -> Set[int]:
+        """Delete path and reset its ancestors; returns them.
+
+        If the path reaches a cycle, every node that can reach one is reset
+        too, so recomputing gives the depths of a full reset (see
+        dbg_kmer_as_key.DBG._delete_path).
+        """
+        reaches_cycle: bool = any(self.cyclic[idx] for idx in path)
+        for idx in path:
+            self.alive[idx] = 0
+            self.visited[idx] = 1
+            self.depth[idx] = 0
+            self.max_depth_child[idx] = -1
+        stack: List[int] = []
+        for idx in path:
+            stack.extend(self.parents[self.parent_offsets[idx]:self.parent_offsets[idx + 1]])
+        seen: Set[int] = set()
+        while stack:
+            idx = stack.pop()
+            if idx in seen or not self.alive[idx]:
+                continue
+            seen.add(idx)
+            self.visited[idx] = 0
+            self.depth[idx] = 0
+            self.max_depth_child[idx] = -1
+            stack.extend(self.parents[self.parent_offsets[idx]:self.parent_offsets[idx + 1]])
+        if reaches_cycle:
+            self.cyclic = self._reaching_cycles()
+            for idx in range(self.n):
+                if self.cyclic[idx]:
+                    seen.add(idx)
+                    self.visited[idx] = 0
+                    self.depth[idx] = 0
+                    self.max_depth_child[idx] = -1
+        return seen
+
+    def _concat_path(self, path: List[int]) -> Optional[str]:
+        if not path:
+            return None
+        bases: List[str] = [decode_kmer(self.kmers[path[0]], self.k)]
+        for i in range(1, len(path)):
+            bases.append(DECODE[self.kmers[path[i]] & 3])
+        return ''.join(bases)
+
+    def graph_size(self) -> Tuple[int, int]:
+        """(nodes, edges) not yet deleted."""
+        alive: bytearray = self.alive
+        edges: int = 0
+        for idx in range(self.n):
+            if alive[idx]:
+                edges += sum(alive[c] for c in
+                             self.children[self.child_offsets[idx]:self.child_offsets[idx + 1]])
+        return alive.count(1), edges
+
+    def gfa_segments(self) -> Iterator[Tuple[int, str, float, List[int]]]:
+        """(id, sequence, k-mer count, child ids) of every live node, for GFA export."""
+        alive: bytearray = self.alive
+        for idx in range(self.n):
+            if alive[idx]:
+                children: array = self.children[self.child_offsets[idx]:self.child_offsets[idx + 1]]
+                yield (idx, decode_kmer(self.kmers[idx], self.k), float(self.counts[idx]),
+                       [c for c in children if alive[c]])
+
+    def get_longest_contig(self) -> Optional[str]:
+        self._prepare_traversal()
+        path: List[int] = self._get_longest_path()
+        contig: Optional[str] = self._concat_path(path)
+        self._delete_path(path)
+        return contig
+
+    def get_top_contigs(self, n: int) -> List[str]:
+        return list(self.iter_top_contigs(n))
+
+    def iter_top_contigs(self, n: int, timer: Optional[StepTimer] = None) -> Iterator[str]:
+        """Yield the first n contigs that repeated get_longest_contig() calls would return.
+
+        Same heap scheme and timer steps as dbg_kmer_as_key.DBG.iter_top_contigs,
+        with the node id as the tie-breaking rank.
+        """
+        if timer is None:
+            timer = StepTimer()
+        t: float = timer.now()
+        self._prepare_traversal()
+        t = timer.lap("contig.reset", t)
+        self._fill_depths()
+        t = timer.lap("contig.depth", t)
+        heap: List[int] = self._top_heap()
+        t = timer.lap("contig.heap", t)
+        found: int = 0
+        while found < n:
+            start: Optional[int] = self._pop_top(heap)
+            if start is None:
+                break
+            path: List[int] = self._trace_path(start)
+            contig: str = self._concat_path(path)
+            t = timer.lap("contig.path", t)
+            invalidated: Set[int] = self._delete_path(path)
+            t = timer.lap("contig.delete", t)
+            self._push_depths(heap, invalidated)
+            timer.lap("contig.recompute", t)
+            found += 1
+            yield contig
+            t = timer.now()
+
+    def _top_heap(self) -> List[int]:
+        """Heap the live nodes by (-depth, id); depths must be filled in."""
+        depth, alive = self.depth, self.alive
+        heap: List[int] = [-depth[idx] << 32 | idx for idx in range(self.n) if alive[idx]]
+        heapq.heapify(heap)
+        return heap
+
+    def _pop_top(self, heap: List[int]) -> Optional[int]:
+        """Start of the deepest remaining path, skipping stale entries; None when empty."""
+        depth, visited, alive = self.depth, self.visited, self.alive
+        while heap:
+            entry: int = heapq.heappop(heap)
+            start: int = entry & 0xFFFFFFFF
+            if alive[start] and visited[start] and depth[start] == -(entry >> 32):
+                return start
+        return None
+
+    def _push_depths(self, heap: List[int], nodes: Set[int]) -> None:
+        """Recompute the depths of nodes in id order and heap them again."""
+        for idx in sorted(nodes):
+            heapq.heappush(heap, -self._get_depth(idx) << 32 | idx)
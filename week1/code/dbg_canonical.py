@@ -0,0 +1,270 @@
+from typing import Iterator, List, Optional, Dict, Tuple
+
+from dbg_kmer_as_key import StepTimer
+from seqops import reverse_complement
+
+BASES: str = 'ACGT'
+BASE_BIT: Dict[str, int] = {'A': 1, 'C': 2, 'G': 4, 'T': 8}
+COMPLEMENT: Dict[str, str] = {'A': 'T', 'T': 'A', 'G': 'C', 'C': 'G'}
+
+# An oriented k-mer is its canonical key plus a strand: 0 reads the key as
+# stored, 1 reads its reverse complement.
+Oriented = Tuple[str, int]
+
+
+def canonical(kmer: str, rc: str) -> Oriented:
+    if rc < kmer:
+        return rc, 1
+    return kmer, 0
+
+
+class Node:
+    __slots__ = ('_out', '_count', 'visited', 'depth', 'max_depth_child')
+    _out: List[int]
+    _count: int
+    visited: List[bool]
+    depth: List[int]
+    max_depth_child: List[Optional[Oriented]]
+
+    def __init__(self) -> None:
+        # one 4-bit mask of successor bases per strand
+        self._out = [0, 0]
+        self._count = 0
+        self.visited = [False, False]
+        self.depth = [0, 0]
+        self.max_depth_child = [None, None]
+
+    def add_child(self, strand: int, base: str) -> None:
+        self._out[strand] |= BASE_BIT[base]
+
+    def increase(self) -> None:
+        self._count += 1
+
+    def reset(self) -> None:
+        self.visited = [False, False]
+        self.depth = [0, 0]
+        self.max_depth_child = [None, None]
+
+    def get_count(self) -> int:
+        return self._count
+
+    def get_out(self, strand: int) -> int:
+        return self._out[strand]
+
+
+class _Frame:
+    __slots__ = ('v', 'children', 'next', 'max_depth', 'max_child')
+    v: Oriented
+    children: List[Oriented]
+    next: int
+    max_depth: int
+    max_child: Optional[Oriented]
+
+    def __init__(self, v: Oriented, children: List[Oriented]) -> None:
+        self.v = v
+        self.children = children
+        self.next = 0
+        self.max_depth = 0
+        self.max_child = None
+
+
+class DBG:
+    """DBG with one node per {k-mer, reverse complement} pair.
+
+    Each read is walked on its forward strand only; an arc a -> b is stored
+    on a's strand and mirrored as rc(b) -> rc(a) on b's opposite strand, so
+    counts match the double-stranded graphs while the node table is halved.
+    Traversal runs over oriented k-mers, and extracting a contig removes
+    both strands of every node on it.
+    """
+    k: int
+    nodes: Dict[str, Node]
+
+    def __init__(self, k: int, data_list: List[List[str]]) -> None:
+        self.k = k
+        self.nodes = {}
+        self._check(data_list)
+        self._build(data_list)
+
+    def _check(self, data_list: List[List[str]]) -> None:
+        assert len(data_list) > 0, "data_list must not be empty"
+        # data may be a lazy stream, so only look at its first read
+        for seq in data_list[0]:
+            assert self.k <= len(seq), "k-mer size larger than read length"
+            break
+
+    def _build(self, data_list: List[List[str]]) -> None:
+        k: int = self.k
+        for data in data_list:
+            for original in data:
+                rc: str = reverse_complement(original)
+                n: int = len(original)
+                if n <= k:
+                    continue
+                kmer1: str = original[:k]
+                rc1: str = rc[n-k:]
+                for i in range(n - k):
+                    kmer2: str = original[i+1:i+1+k]
+                    rc2: str = rc[n-i-1-k:n-i-1]
+                    self._add_arc(kmer1, rc1, kmer2, rc2)
+                    kmer1, rc1 = kmer2, rc2
+
+    def _add_node(self, kmer: str) -> Node:
+        node: Optional[Node] = self.nodes.get(kmer)
+        if node is None:
+            node = Node()
+            self.nodes[kmer] = node
+        node.increase()
+        return node
+
+    def _add_arc(self, kmer1: str, rc1: str, kmer2: str, rc2: str) -> None:
+        if rc1 < kmer1:
+            self._add_node(rc1).add_child(1, kmer2[-1])
+        else:
+            self._add_node(kmer1).add_child(0, kmer2[-1])
+        # the mirrored arc rc2 -> rc1 leaves the strand of kmer2 that reads rc2
+        if rc2 < kmer2:
+            self._add_node(rc2).add_child(0, rc1[-1])
+        else:
+            self._add_node(kmer2).add_child(1, rc1[-1])
+
+    def _oriented(self, v: Oriented) -> Tuple[str, str]:
+        """Return (sequence of v, sequence of its reverse complement)."""
+        rc: str = reverse_complement(v[0])
+        if v[1] == 0:
+            return v[0], rc
+        return rc, v[0]
+
+    def _get_children(self, v: Oriented) -> List[Oriented]:
+        mask: int = self.nodes[v[0]].get_out(v[1])
+        if mask == 0:
+            return []
+        seq, rc = self._oriented(v)
+        children: List[Oriented] = []
+        for base in BASES:
+            if mask & BASE_BIT[base]:
+                child: Oriented = canonical(seq[1:] + base, COMPLEMENT[base] + rc[:-1])
+                # arcs into deleted nodes are dropped lazily here
+                if child[0] in self.nodes:
+                    children.append(child)
+        return children
+
+    def _get_count(self, v: Oriented) -> int:
+        return self.nodes[v[0]].get_count()
+
+    def _get_sorted_children(self, v: Oriented) -> List[Oriented]:
+        children: List[Oriented] = self._get_children(v)
+        children.sort(key=self._get_count, reverse=True)
+        return children
+
+    def _get_depth(self, v: Oriented) -> int:
+        # Explicit-stack DFS; a child still on the stack (a cycle) contributes
+        # depth 0, exactly as in the recursive formulation.
+        node: Node = self.nodes[v[0]]
+        if node.visited[v[1]]:
+            return node.depth[v[1]]
+        node.visited[v[1]] = True
+        stack: List[_Frame] = [_Frame(v, self._get_sorted_children(v))]
+        while stack:
+            frame: _Frame = stack[-1]
+            if frame.next < len(frame.children):
+                child: Oriented = frame.children[frame.next]
+                frame.next += 1
+                child_node: Node = self.nodes[child[0]]
+                if not child_node.visited[child[1]]:
+                    child_node.visited[child[1]] = True
+                    stack.append(_Frame(child, self._get_sorted_children(child)))
+                elif child_node.depth[child[1]] > frame.max_depth:
+                    frame.max_depth, frame.max_child = child_node.depth[child[1]], child
+                continue
+            stack.pop()
+            done: Node = self.nodes[frame.v[0]]
+            strand: int = frame.v[1]
+            done.depth[strand] = frame.max_depth + 1
+            done.max_depth_child[strand] = frame.max_child
+            if stack:
+                parent: _Frame = stack[-1]
+                if done.depth[strand] > parent.max_depth:
+                    parent.max_depth, parent.max_child = done.depth[strand], frame.v
+        return node.depth[v[1]]
+
+    def _reset(self) -> None:
+        for node in self.nodes.values():
+            node.reset()
+
+    def _prepare_traversal(self) -> None:
+        self._reset()
+
+    def _deepest(self) -> Optional[Oriented]:
+        """Fill in all depths and return the start of the deepest path."""
+        max_depth: int = 0
+        max_v: Optional[Oriented] = None
+        for kmer in self.nodes.keys():
+            for strand in (0, 1):
+                depth: int = self._get_depth((kmer, strand))
+                if depth > max_depth:
+                    max_depth, max_v = depth, (kmer, strand)
+        return max_v
+
+    def _trace_path(self, start: Optional[Oriented]) -> List[Oriented]:
+        path: List[Oriented] = []
+        while start is not None:
+            path.append(start)
+            start = self.nodes[start[0]].max_depth_child[start[1]]
+        return path
+
+    def _get_longest_path(self) -> List[Oriented]:
+        return self._trace_path(self._deepest())
+
+    def _delete_path(self, path: List[Oriented]) -> None:
+        for v in path:
+            if v[0] in self.nodes:
+                del self.nodes[v[0]]
+
+    def _concat_path(self, path: List[Oriented]) -> Optional[str]:
+        if not path:
+            return None
+        bases: List[str] = [self._oriented(path[0])[0]]
+        for i in range(1, len(path)):
+            bases.append(self._oriented(path[i])[0][-1])
+        return ''.join(bases)
+
+    def graph_size(self) -> Tuple[int, int]:
+        """(oriented nodes, oriented edges), counting each strand separately."""
+        edges: int = sum(len(self._get_children((kmer, strand)))
+                         for kmer in self.nodes for strand in (0, 1))
+        return 2 * len(self.nodes), edges
+
+    def get_longest_contig(self) -> Optional[str]:
+        self._prepare_traversal()
+        path: List[Oriented] = self._get_longest_path()
+        contig: Optional[str] = self._concat_path(path)
+        self._delete_path(path)
+        return contig
+
+    def get_top_contigs(self, n: int) -> List[str]:
+        return list(self.iter_top_contigs(n))
+
+    def iter_top_contigs(self, n: int, timer: Optional[StepTimer] = None) -> Iterator[str]:
+        """Yield the first n contigs of repeated get_longest_contig() calls.
+
+        This engine recomputes every depth per contig, so there is no
+        incremental state to reuse; with timer, contig.reset, contig.depth,
+        contig.path and contig.delete are lapped for every contig.
+        """
+        if timer is None:
+            timer = StepTimer()
+        for _ in range(n):
+            t: float = timer.now()
+            self._prepare_traversal()
+            t = timer.lap("contig.reset", t)
+            start: Optional[Oriented] = self._deepest()
+            t = timer.lap("contig.depth", t)
+            path: List[Oriented] = self._trace_path(start)
+            contig: Optional[str] = self._concat_path(path)
+            t = timer.lap("contig.path", t)
+            self._delete_path(path)
+            timer.lap("contig.delete", t)
+            if contig is None:
+                break
+            yield contig
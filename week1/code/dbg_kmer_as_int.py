@@ -0,0 +1,349 @@
+from array import array
+from typing import Iterable, Iterator, List, Optional, Dict, Set, Tuple
+import hashlib
+import os
+import struct
+import dbg_kmer_as_key
+from read_store import ReadStore
+from seqops import decode_2bit, encode_2bit
+
+# 2 bits per base, so any k <= 31 fits in a single 64-bit word
+ENCODE: Dict[str, int] = {'A': 0, 'C': 1, 'G': 2, 'T': 3}
+DECODE: str = 'ACGT'
+MAX_K: int = 31
+
+# Snapshot layout, all arrays uint64:
+#   k-mer graph:  header | k-mer codes | counts | edge ((k+1)-mer) codes
+#   unitig graph: header | head codes | counts | (parent, child) head pairs
+#                 | lengths | coverages | concatenated unitig sequences
+SNAPSHOT_MAGIC: bytes = b'DBGGRAPH'
+SNAPSHOT_VERSION: int = 1
+SNAPSHOT_COMPACTED: int = 1
+# magic, version, flags, k, n_nodes, n_edges
+SNAPSHOT_HEADER: struct.Struct = struct.Struct('<8sHHIQQ')
+
+
+def encode_kmer(kmer: str) -> int:
+    return encode_2bit(kmer)
+
+
+def decode_kmer(code: int, k: int) -> str:
+    return decode_2bit(code, k)
+
+
+def reverse_complement_code(code: int, k: int) -> int:
+    rc: int = 0
+    for _ in range(k):
+        rc = (rc << 2) | (3 - (code & 3))
+        code >>= 2
+    return rc
+
+
+def snapshot_key(paths: List[str], k: int) -> str:
+    """Cache key for a graph built from paths with k; changes when any input does."""
+    h = hashlib.sha256(f"v{SNAPSHOT_VERSION} k={k}".encode())
+    for path in paths:
+        if os.path.exists(path):
+            st: os.stat_result = os.stat(path)
+            h.update(f"|{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}".encode())
+        else:
+            h.update(f"|{os.path.abspath(path)}:missing".encode())
+    return h.hexdigest()[:16]
+
+
+def kmer_codes(seq: str, k: int) -> List[int]:
+    """Rolling 2-bit codes of every k-mer in seq, left to right."""
+    mask: int = (1 << (2 * k)) - 1
+    codes: List[int] = []
+    code: int = 0
+    for i, c in enumerate(seq):
+        code = ((code << 2) | ENCODE[c]) & mask
+        if i >= k - 1:
+            codes.append(code)
+    return codes
+
+
+def rc_kmer_codes(seq: str, k: int) -> List[int]:
+    """Rolling codes of the reverse complement of every k-mer in seq, left to right."""
+    shift: int = 2 * (k - 1)
+    codes: List[int] = []
+    code: int = 0
+    for i, c in enumerate(seq):
+        code = (code >> 2) | ((3 - ENCODE[c]) << shift)
+        if i >= k - 1:
+            codes.append(code)
+    return codes
+
+
+def iter_read_codes(data: Iterable[str], k: int) -> Iterator[Tuple[List[int], List[int]]]:
+    """Yield (k-mer codes, RC codes) for every read longer than k.
+
+    Read stores hand out codes straight from their packed bytes; anything
+    else is treated as an iterable of read strings.
+    """
+    if isinstance(data, ReadStore):
+        for i in range(len(data)):
+            if data.read_length(i) > k:
+                yield data.kmer_codes(i, k)
+        return
+    for read in data:
+        if len(read) > k:
+            yield kmer_codes(read, k), rc_kmer_codes(read, k)
+
+
+def solid_runs(codes: List[int], solid: Set[int]) -> Iterator[Tuple[int, int]]:
+    """(start, end) of every maximal run of at least two solid k-mers in codes."""
+    start: int = -1
+    for i, code in enumerate(codes):
+        if code in solid:
+            if start < 0:
+                start = i
+            continue
+        if start >= 0 and i - start > 1:
+            yield start, i
+        start = -1
+    if start >= 0 and len(codes) - start > 1:
+        yield start, len(codes)
+
+
+class Node:
+    __slots__ = ('_children', '_parents', '_count', 'visited', 'depth', 'max_depth_child',
+                 'length', 'coverage', 'seq')
+    _children: Set[int]
+    _parents: Set[int]
+    _count: int
+    visited: bool
+    depth: int
+    max_depth_child: Optional[int]
+    # set by DBG.compact(): a unitig node stands for `length` k-mers
+    length: int
+    coverage: int
+    seq: Optional[str]
+
+    def __init__(self) -> None:
+        self._children = set()
+        self._parents = set()
+        self._count = 0
+        self.visited = False
+        self.depth = 0
+        self.max_depth_child = None
+        self.length = 1
+        self.coverage = 0
+        self.seq = None
+
+    def add_child(self, kmer: int) -> None:
+        self._children.add(kmer)
+
+    def add_parent(self, kmer: int) -> None:
+        self._parents.add(kmer)
+
+    def increase(self) -> None:
+        self._count += 1
+
+    def reset(self) -> None:
+        self.visited = False
+        self.depth = 0
+        self.max_depth_child = None
+
+    def get_count(self) -> int:
+        return self._count
+
+    def get_children(self) -> List[int]:
+        return list(self._children)
+
+    def get_parents(self) -> List[int]:
+        return list(self._parents)
+
+    def remove_children(self, target: Set[int]) -> None:
+        self._children -= target
+
+    def remove_parents(self, target: Set[int]) -> None:
+        self._parents -= target
+
+
+class DBG(dbg_kmer_as_key.DBG):
+    """DBG keyed by 2-bit packed k-mers instead of k-mer strings.
+
+    Arcs are inserted in the same order as the string-keyed graph, so node
+    counts, adjacency and dict iteration order are identical; only the key
+    type differs.
+
+    If solid is given (see kmer_filter.solid_kmers), only arcs between two
+    solid k-mers are added, so filtered k-mers never get a Node.
+    """
+    nodes: Dict[int, Node]
+    _solid: Optional[Set[int]]
+
+    def __init__(self, k: int, data_list: List[Iterable[str]],
+                 solid: Optional[Set[int]] = None) -> None:
+        self._solid = solid
+        super().__init__(k, data_list)
+        self._solid = None
+
+    @classmethod
+    def from_counts(cls, k: int, kmers: Iterable[int], counts: Iterable[int],
+                    edges: Iterable[int]) -> 'DBG':
+        """Build a graph from precomputed count tables (see kmer_count.py).
+
+        kmers/counts give every k-mer with its arc-endpoint count, and edges
+        are (k+1)-mer codes; both are inserted in the order given, so tables
+        in first-occurrence order yield the same graph as _build.
+        """
+        assert k <= MAX_K, f"k-mer size must be at most {MAX_K}"
+        dbg: DBG = cls.__new__(cls)
+        dbg._init_graph(k)
+        nodes: Dict[int, Node] = dbg.nodes
+        for kmer, count in zip(kmers, counts):
+            node: Node = Node()
+            node._count = int(count)
+            nodes[int(kmer)] = node
+        mask: int = (1 << (2 * k)) - 1
+        for edge in edges:
+            edge = int(edge)
+            kmer1: int = edge >> 2
+            kmer2: int = edge & mask
+            nodes[kmer1]._children.add(kmer2)
+            nodes[kmer2]._parents.add(kmer1)
+        return dbg
+
+    def save(self, path: str) -> None:
+        """Write the graph, k-mer or compacted, to path as a binary snapshot.
+
+        Nodes and edges are written in iteration order, so load() rebuilds
+        the same dict and set orders and therefore the same contigs.
+        """
+        kmers: array = array('Q', self.nodes.keys())
+        counts: array = array('Q', (node._count for node in self.nodes.values()))
+        edges: array = array('Q')
+        for kmer, node in self.nodes.items():
+            if self.compacted:
+                for child in node._children:
+                    edges.extend((kmer, child))
+            else:
+                edges.extend((kmer << 2) | (child & 3) for child in node._children)
+        n_edges: int = len(edges) // 2 if self.compacted else len(edges)
+        flags: int = SNAPSHOT_COMPACTED if self.compacted else 0
+        tmp_path: str = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, flags,
+                                         self.k, len(kmers), n_edges))
+            kmers.tofile(f)
+            counts.tofile(f)
+            edges.tofile(f)
+            if self.compacted:
+                array('Q', (node.length for node in self.nodes.values())).tofile(f)
+                array('Q', (node.coverage for node in self.nodes.values())).tofile(f)
+                f.write(''.join(node.seq for node in self.nodes.values()).encode('ascii'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'DBG':
+        with open(path, 'rb') as f:
+            magic, version, flags, k, n_nodes, n_edges = SNAPSHOT_HEADER.unpack(f.read(SNAPSHOT_HEADER.size))
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                raise ValueError(f"{path} is not a version {SNAPSHOT_VERSION} graph snapshot")
+            kmers: array = array('Q')
+            counts: array = array('Q')
+            edges: array = array('Q')
+            kmers.fromfile(f, n_nodes)
+            counts.fromfile(f, n_nodes)
+            if not flags & SNAPSHOT_COMPACTED:
+                edges.fromfile(f, n_edges)
+                return cls.from_counts(k, kmers.tolist(), counts.tolist(), edges.tolist())
+            edges.fromfile(f, 2 * n_edges)
+            lengths: array = array('Q')
+            coverages: array = array('Q')
+            lengths.fromfile(f, n_nodes)
+            coverages.fromfile(f, n_nodes)
+            seqs: str = f.read().decode('ascii')
+        dbg: DBG = cls.__new__(cls)
+        dbg._init_graph(k)
+        start: int = 0
+        for kmer, count, length, coverage in zip(kmers, counts, lengths, coverages):
+            node: Node = Node()
+            node._count = count
+            node.length = length
+            node.coverage = coverage
+            node.seq = seqs[start:start + length + k - 1]
+            start += length + k - 1
+            dbg.nodes[kmer] = node
+        for i in range(0, len(edges), 2):
+            dbg.nodes[edges[i]]._children.add(edges[i + 1])
+            dbg.nodes[edges[i + 1]]._parents.add(edges[i])
+        dbg.compacted = True
+        return dbg
+
+    def _check(self, data_list: List[List[str]]) -> None:
+        super()._check(data_list)
+        assert self.k <= MAX_K, f"k-mer size must be at most {MAX_K}"
+
+    def _build(self, data_list: List[List[str]]) -> None:
+        k: int = self.k
+        solid: Optional[Set[int]] = self._solid
+        for data in data_list:
+            for fwd, rev in iter_read_codes(data, k):
+                # rc[i:i+k] of the string version is the RC of forward window
+                # len(fwd) - 1 - i, so walk the RC codes backwards
+                rev.reverse()
+                if solid is None:
+                    self._add_read(fwd, rev)
+                    continue
+                # counts are strand-symmetric, so a solid forward run maps
+                # onto a solid run of the reversed RC codes
+                n: int = len(fwd)
+                for start, end in solid_runs(fwd, solid):
+                    self._add_read(fwd[start:end], rev[n - end:n - start])
+
+    def _add_read(self, fwd: List[int], rev: List[int]) -> None:
+        # _add_arc inlined for both strands; this loop dominates build time
+        nodes: Dict[int, Node] = self.nodes
+        prev_f: Node = self._get_or_add(fwd[0])
+        prev_r: Optional[Node] = None
+        for i in range(1, len(fwd)):
+            f: int = fwd[i]
+            node_f: Optional[Node] = nodes.get(f)
+            if node_f is None:
+                node_f = Node()
+                nodes[f] = node_f
+            if prev_r is None:
+                # keep the string version's insertion order: f0, f1, r0, r1
+                prev_r = self._get_or_add(rev[0])
+            prev_f._count += 1
+            node_f._count += 1
+            prev_f._children.add(f)
+            node_f._parents.add(fwd[i - 1])
+            r: int = rev[i]
+            node_r: Optional[Node] = nodes.get(r)
+            if node_r is None:
+                node_r = Node()
+                nodes[r] = node_r
+            prev_r._count += 1
+            node_r._count += 1
+            prev_r._children.add(r)
+            node_r._parents.add(rev[i - 1])
+            prev_f, prev_r = node_f, node_r
+
+    def _new_node(self) -> Node:
+        return Node()
+
+    def _get_or_add(self, kmer: int) -> Node:
+        node: Optional[Node] = self.nodes.get(kmer)
+        if node is None:
+            node = Node()
+            self.nodes[kmer] = node
+        return node
+
+    def _add_node(self, kmer: int) -> None:
+        self._get_or_add(kmer).increase()
+
+    def _add_arc(self, kmer1: int, kmer2: int) -> None:
+        self._add_node(kmer1)
+        self._add_node(kmer2)
+        self.nodes[kmer1].add_child(kmer2)
+        self.nodes[kmer2].add_parent(kmer1)
+
+    def _spell(self, path: List[int]) -> str:
+        bases: List[str] = [decode_kmer(path[0], self.k)]
+        for i in range(1, len(path)):
+            bases.append(DECODE[path[i] & 3])
+        return ''.join(bases)
@@ -1,6 +1,10 @@
 import copy
-from typing import List, Optional, Dict, Set
+import heapq
+from typing import Iterator, List, Optional, Dict, Set, Tuple
 
+
+# main.codon.py builds on this engine, so it keeps a Codon-compatible
+# reverse complement; the Python-only engines use seqops instead
 def reverse_complement(key: str) -> str:
     complement: Dict[str, str] = {'A': 'T', 'T': 'A', 'G': 'C', 'C': 'G'}
     key_list: List[str] = list(key[::-1])
@@ -11,22 +15,34 @@ def reverse_complement(key: str) -> str:
 
 class Node:
     _children: Set[str]
+    _parents: Set[str]
     _count: int
     visited: bool
     depth: int
     max_depth_child: Optional[str]
+    # set by DBG.compact(): a unitig node stands for `length` k-mers
+    length: int
+    coverage: int
+    seq: Optional[str]
 
     def __init__(self) -> None:
         self._children = set()
+        self._parents = set()
         self._count = 0
         self.visited = False
         self.depth = 0
         self.max_depth_child = None
+        self.length = 1
+        self.coverage = 0
+        self.seq = None
 
     def add_child(self, kmer: str) -> None:
         if kmer is not None:
             self._children.add(kmer)
 
+    def add_parent(self, kmer: str) -> None:
+        self._parents.add(kmer)
+
     def increase(self) -> None:
         self._count += 1
 
@@ -41,23 +57,83 @@ class Node:
     def get_children(self) -> List[str]:
         return list(self._children)
 
+    def get_parents(self) -> List[str]:
+        return list(self._parents)
+
     def remove_children(self, target: Set[str]) -> None:
         self._children -= target
 
+    def remove_parents(self, target: Set[str]) -> None:
+        self._parents -= target
+
+
+class _Frame:
+    kmer: str
+    children: List[str]
+    next: int
+    max_depth: int
+    max_child: Optional[str]
+
+    def __init__(self, kmer: str, children: List[str]) -> None:
+        self.kmer = kmer
+        self.children = children
+        self.next = 0
+        self.max_depth = 0
+        self.max_child = None
+
+
+class _TopHeap:
+    """iter_top_contigs state: heap entries and each node's scan rank."""
+    entries: List[int]
+    keys: List[str]
+    rank: Dict[str, int]
+
+    def __init__(self, keys: List[str]) -> None:
+        self.entries = []
+        self.keys = keys
+        self.rank = {kmer: i for i, kmer in enumerate(keys)}
+
+
+class StepTimer:
+    """Timing hooks for iter_top_contigs; this one ignores every step.
+
+    lap(step, start) closes a step begun at start and returns the start of
+    the next one. profiling.StageTimer records each lap as a stage.
+    """
+
+    def now(self) -> float:
+        return 0.0
+
+    def lap(self, step: str, start: float) -> float:
+        return 0.0
+
 
 class DBG:
     k: int
     nodes: Dict[str, Node]
+    compacted: bool
+    _depths_valid: bool
+    # nodes that can reach a cycle, as of the last full depth reset
+    _cyclic: Set[str]
 
     def __init__(self, k: int, data_list: List[List[str]]) -> None:
-        self.k = k
-        self.nodes = {}
+        self._init_graph(k)
         self._check(data_list)
         self._build(data_list)
 
+    def _init_graph(self, k: int) -> None:
+        self.k = k
+        self.nodes = {}
+        self.compacted = False
+        self._depths_valid = False
+        self._cyclic = set()
+
     def _check(self, data_list: List[List[str]]) -> None:
         assert len(data_list) > 0, "data_list must not be empty"
-        assert self.k <= len(data_list[0][0]), "k-mer size larger than read length"
+        # data may be a lazy stream, so only look at its first read
+        for seq in data_list[0]:
+            assert self.k <= len(seq), "k-mer size larger than read length"
+            break
 
     def _build(self, data_list: List[List[str]]) -> None:
         for data in data_list:
@@ -75,14 +151,18 @@ class DBG:
         if kmer is None or len(kmer) != self.k:
             return
         if kmer not in self.nodes:
-            self.nodes[kmer] = Node()
+            self.nodes[kmer] = self._new_node()
         self.nodes[kmer].increase()
 
+    def _new_node(self) -> Node:
+        return Node()
+
     def _add_arc(self, kmer1: Optional[str], kmer2: Optional[str]) -> None:
         self._add_node(kmer1)
         self._add_node(kmer2)
         if kmer1 is not None and kmer2 is not None:
             self.nodes[kmer1].add_child(kmer2)
+            self.nodes[kmer2].add_parent(kmer1)
 
     def _get_count(self, child: str) -> int:
         return self.nodes[child].get_count()
@@ -93,56 +173,371 @@ class DBG:
         return children
 
     def _get_depth(self, kmer: str) -> int:
+        # Explicit-stack DFS mirroring the recursive definition: a node's depth
+        # is 1 + the deepest child, children are tried in count order, and a
+        # child still on the stack (a cycle) contributes depth 0.
         node: Node = self.nodes[kmer]
-        if not node.visited:
-            node.visited = True
-            children: List[str] = self._get_sorted_children(kmer)
-            max_depth: int = 0
-            max_child: Optional[str] = None
-            for child in children:
-                depth: int = self._get_depth(child)
-                if depth > max_depth:
-                    max_depth, max_child = depth, child
-            node.depth = max_depth + 1
-            node.max_depth_child = max_child
+        if node.visited:
+            return node.depth
+        node.visited = True
+        stack: List[_Frame] = [_Frame(kmer, self._get_sorted_children(kmer))]
+        while stack:
+            frame: _Frame = stack[-1]
+            if frame.next < len(frame.children):
+                child: str = frame.children[frame.next]
+                frame.next += 1
+                child_node: Node = self.nodes[child]
+                if not child_node.visited:
+                    child_node.visited = True
+                    stack.append(_Frame(child, self._get_sorted_children(child)))
+                elif child_node.depth > frame.max_depth:
+                    frame.max_depth, frame.max_child = child_node.depth, child
+                continue
+            stack.pop()
+            done: Node = self.nodes[frame.kmer]
+            done.depth = frame.max_depth + done.length
+            done.max_depth_child = frame.max_child
+            if stack:
+                parent: _Frame = stack[-1]
+                if done.depth > parent.max_depth:
+                    parent.max_depth, parent.max_child = done.depth, frame.kmer
         return node.depth
 
     def _reset(self) -> None:
         for node in self.nodes.values():
             node.reset()
 
-    def _get_longest_path(self) -> List[str]:
+    def _prepare_traversal(self) -> None:
+        if not self._depths_valid:
+            self._reset()
+            self._cyclic = self._reaching_cycles()
+            self._depths_valid = True
+
+    def _reaching_cycles(self) -> Set[str]:
+        """Nodes from which a cycle (self-loops included) can be reached.
+
+        Sinks are peeled off repeatedly, along with every node whose
+        children have all been peeled; what remains reaches a cycle.
+        """
+        out_degree: Dict[str, int] = {kmer: len(node._children) for kmer, node in self.nodes.items()}
+        stack: List[str] = [kmer for kmer, degree in out_degree.items() if degree == 0]
+        while stack:
+            for parent in self.nodes[stack.pop()]._parents:
+                out_degree[parent] -= 1
+                if out_degree[parent] == 0:
+                    stack.append(parent)
+        return {kmer for kmer, degree in out_degree.items() if degree > 0}
+
+    def _deepest(self) -> Optional[str]:
+        """Fill in all depths and return the start of the deepest path."""
         max_depth: int = 0
         max_kmer: Optional[str] = None
         for kmer in self.nodes.keys():
             depth: int = self._get_depth(kmer)
             if depth > max_depth:
                 max_depth, max_kmer = depth, kmer
+        return max_kmer
+
+    def _trace_path(self, start: Optional[str]) -> List[str]:
         path: List[str] = []
-        while max_kmer is not None:
-            path.append(max_kmer)
-            max_kmer = self.nodes[max_kmer].max_depth_child
+        while start is not None:
+            path.append(start)
+            start = self.nodes[start].max_depth_child
         return path
 
-    def _delete_path(self, path: List[str]) -> None:
+    def _get_longest_path(self) -> List[str]:
+        return self._trace_path(self._deepest())
+
+    def _delete_path(self, path: List[str]) -> Set[str]:
+        # Only neighbours of the path need their edge sets updated, and the
+        # ancestors of the path are reset. Depths of nodes that cannot reach
+        # a cycle do not depend on DFS order, so they are kept. Depths of
+        # nodes that can reach one depend on where the DFS entered each
+        # cycle; that can only change when the path itself reaches a cycle,
+        # and then all of them are reset as well. Recomputing the returned
+        # nodes in graph order therefore gives the depths of a full reset.
         path_set: Set[str] = set(path)
+        reaches_cycle: bool = not path_set.isdisjoint(self._cyclic)
+        parents: Set[str] = set()
         for kmer in path:
-            if kmer in self.nodes:
-                del self.nodes[kmer]
-        for kmer in self.nodes.keys():
+            if kmer not in self.nodes:
+                continue
+            node: Node = self.nodes.pop(kmer)
+            parents.update(node.get_parents())
+            for child in node.get_children():
+                if child not in path_set:
+                    self.nodes[child].remove_parents(path_set)
+        parents -= path_set
+        for kmer in parents:
             self.nodes[kmer].remove_children(path_set)
+        invalidated: Set[str] = self._invalidate(parents)
+        if reaches_cycle:
+            self._cyclic = self._reaching_cycles()
+            for kmer in self._cyclic:
+                self.nodes[kmer].reset()
+            invalidated |= self._cyclic
+        return invalidated
 
-    def _concat_path(self, path: List[str]) -> Optional[str]:
-        if not path:
-            return None
+    def _invalidate(self, kmers: Set[str]) -> Set[str]:
+        """Reset the traversal state of kmers and all of their ancestors; returns them all."""
+        stack: List[str] = list(kmers)
+        seen: Set[str] = set(kmers)
+        while stack:
+            node: Node = self.nodes[stack.pop()]
+            node.reset()
+            for parent in node.get_parents():
+                if parent not in seen:
+                    seen.add(parent)
+                    stack.append(parent)
+        return seen
+
+    def _spell(self, path: List[str]) -> str:
         concat: str = copy.copy(path[0])
         for i in range(1, len(path)):
             concat += path[i][-1]
         return concat
 
+    def _concat_path(self, path: List[str]) -> Optional[str]:
+        if not path:
+            return None
+        if not self.compacted:
+            return self._spell(path)
+        # consecutive unitigs overlap by k - 1 bases
+        parts: List[str] = [self.nodes[path[0]].seq]
+        for i in range(1, len(path)):
+            parts.append(self.nodes[path[i]].seq[self.k - 1:])
+        return ''.join(parts)
+
+    def _extend_unitig(self, head: str, owner: Dict[str, str]) -> List[str]:
+        chain: List[str] = [head]
+        owner[head] = head
+        node: Node = self.nodes[head]
+        while len(node._children) == 1:
+            nxt: str = next(iter(node._children))
+            nxt_node: Node = self.nodes[nxt]
+            if len(nxt_node._parents) != 1 or nxt in owner:
+                break
+            chain.append(nxt)
+            owner[nxt] = head
+            node = nxt_node
+        return chain
+
+    def compact(self) -> None:
+        """Collapse non-branching chains into unitig nodes.
+
+        A unitig is keyed by its first k-mer and keeps that k-mer's count for
+        child ordering, so depths and path choices match the k-mer graph on
+        acyclic regions. Compacting an already compacted graph merges the
+        chains left behind by simplify().
+        """
+        owner: Dict[str, str] = {}
+        chains: List[List[str]] = []
+        for kmer, node in self.nodes.items():
+            if kmer in owner:
+                continue
+            if len(node._parents) == 1:
+                parent: Node = self.nodes[next(iter(node._parents))]
+                if len(parent._children) == 1 and parent is not node:
+                    continue  # interior k-mer, reached from its chain head
+            chains.append(self._extend_unitig(kmer, owner))
+        # chains that are pure cycles have no head; start them anywhere
+        for kmer in self.nodes.keys():
+            if kmer not in owner:
+                chains.append(self._extend_unitig(kmer, owner))
+
+        unitigs: Dict[str, Node] = {}
+        for chain in chains:
+            head: Node = self.nodes[chain[0]]
+            tail: Node = self.nodes[chain[-1]]
+            unitig: Node = self._new_node()
+            unitig._count = head.get_count()
+            unitig.length = sum(self.nodes[kmer].length for kmer in chain)
+            unitig.coverage = sum(self._coverage(self.nodes[kmer]) for kmer in chain)
+            unitig.seq = self._concat_path(chain)
+            unitig._children = set(tail._children)
+            unitig._parents = {owner[parent] for parent in head._parents}
+            unitigs[chain[0]] = unitig
+        self.nodes = unitigs
+        self.compacted = True
+        self._depths_valid = False
+
+    def _coverage(self, node: Node) -> int:
+        return node.coverage if self.compacted else node.get_count()
+
+    def _mean_coverage(self, kmer: str) -> float:
+        node: Node = self.nodes[kmer]
+        return node.coverage / node.length
+
+    def _is_tip(self, kmer: str, anchor: str, siblings: Set[str], tips: Set[str]) -> bool:
+        # siblings: the anchor's other parents (or children) the tip competes with
+        rivals: List[str] = [s for s in siblings if s != kmer and s not in tips]
+        if anchor == kmer or not rivals:
+            return False
+        return self._mean_coverage(kmer) <= max(self._mean_coverage(s) for s in rivals)
+
+    def _find_tips(self, tip_length: int) -> Set[str]:
+        """Short dead-end unitigs hanging off a node that has a better way in or out."""
+        tips: Set[str] = set()
+        for kmer, node in self.nodes.items():
+            if node.length >= tip_length:
+                continue
+            if not node._parents and len(node._children) == 1:
+                anchor: str = next(iter(node._children))
+                if self._is_tip(kmer, anchor, self.nodes[anchor]._parents, tips):
+                    tips.add(kmer)
+            elif not node._children and len(node._parents) == 1:
+                anchor = next(iter(node._parents))
+                if self._is_tip(kmer, anchor, self.nodes[anchor]._children, tips):
+                    tips.add(kmer)
+        return tips
+
+    def _find_bubbles(self, bubble_length: int, removed: Set[str]) -> Set[str]:
+        """Weaker branches of simple bubbles: short unitigs sharing one parent and one child."""
+        losers: Set[str] = set()
+        for kmer, node in self.nodes.items():
+            if len(node._children) < 2 or kmer in removed:
+                continue
+            branches: Dict[str, List[str]] = {}
+            for child in node._children:
+                child_node: Node = self.nodes[child]
+                if (child in removed or child in losers or child == kmer
+                        or child_node.length > bubble_length
+                        or len(child_node._parents) != 1 or len(child_node._children) != 1):
+                    continue
+                end: str = next(iter(child_node._children))
+                if end not in (kmer, child):
+                    branches.setdefault(end, []).append(child)
+            for group in branches.values():
+                if len(group) > 1:
+                    group.sort(key=self._mean_coverage, reverse=True)
+                    losers.update(group[1:])
+        return losers
+
+    def simplify(self, tip_length: Optional[int] = None,
+                 bubble_length: Optional[int] = None) -> Dict[str, int]:
+        """Clip short tips and pop simple bubbles, then re-compact.
+
+        Works on the unitig graph (compacting first if needed) in one linear
+        pass each. A tip is a dead-end unitig of fewer than tip_length k-mers
+        (default 2k) whose anchor has a sibling of at least its mean coverage;
+        a bubble is a set of unitigs of at most bubble_length k-mers (default
+        2k) between the same two nodes, of which only the best-covered one is
+        kept. Returns how many tips, bubble branches, k-mers and arcs were
+        removed.
+        """
+        if not self.compacted:
+            self.compact()
+        tip_length = tip_length or 2 * self.k
+        bubble_length = bubble_length or 2 * self.k
+        tips: Set[str] = self._find_tips(tip_length)
+        losers: Set[str] = self._find_bubbles(bubble_length, tips)
+        doomed: Set[str] = tips | losers
+        kmers_removed: int = 0
+        arcs_removed: int = 0
+        for kmer in doomed:
+            node: Node = self.nodes.pop(kmer)
+            kmers_removed += node.length
+            arcs_removed += node.length - 1 + len(node._children)
+            for child in node._children:
+                if child not in doomed:
+                    self.nodes[child]._parents.discard(kmer)
+            for parent in node._parents:
+                if parent not in doomed:
+                    self.nodes[parent]._children.discard(kmer)
+                    arcs_removed += 1
+        self.compact()
+        return {"tips": len(tips), "bubbles": len(losers),
+                "nodes_removed": kmers_removed, "edges_removed": arcs_removed}
+
+    def graph_size(self) -> Tuple[int, int]:
+        """(nodes, edges) currently in the graph."""
+        return len(self.nodes), sum(len(node._children) for node in self.nodes.values())
+
+    def gfa_segments(self) -> Iterator[Tuple[int, str, float, List[int]]]:
+        """(id, sequence, mean k-mer coverage, child ids) of every node, for GFA export.
+
+        Ids follow node order. Both strands are in the graph, so each
+        sequence also appears reverse-complemented as another segment.
+        """
+        ids: Dict[str, int] = {kmer: i for i, kmer in enumerate(self.nodes.keys())}
+        for kmer, node in self.nodes.items():
+            yield (ids[kmer], self._concat_path([kmer]), self._coverage(node) / node.length,
+                   [ids[child] for child in node._children])
+
     def get_longest_contig(self) -> Optional[str]:
-        self._reset()
+        self._prepare_traversal()
         path: List[str] = self._get_longest_path()
         contig: Optional[str] = self._concat_path(path)
         self._delete_path(path)
         return contig
+
+    def get_top_contigs(self, n: int) -> List[str]:
+        return list(self.iter_top_contigs(n))
+
+    def iter_top_contigs(self, n: int, timer: Optional[StepTimer] = None) -> Iterator[str]:
+        """Yield the first n contigs that repeated get_longest_contig() calls would return.
+
+        Depths are computed once and kept in a heap ordered like _deepest's
+        scan (deepest first, then graph order). After each deletion only the
+        invalidated ancestors are recomputed, in that same order, and pushed
+        again; entries of deleted or changed nodes are skipped when popped.
+        See _delete_path for which nodes are invalidated on cyclic graphs.
+
+        With timer, the one-off contig.reset, contig.depth and contig.heap
+        steps and the per-contig contig.path, contig.delete and
+        contig.recompute steps are lapped; time spent by the caller between
+        contigs is not.
+        """
+        if timer is None:
+            timer = StepTimer()
+        t: float = timer.now()
+        self._prepare_traversal()
+        t = timer.lap("contig.reset", t)
+        self._fill_depths()
+        t = timer.lap("contig.depth", t)
+        heap: _TopHeap = self._top_heap()
+        t = timer.lap("contig.heap", t)
+        found: int = 0
+        while found < n:
+            start: Optional[str] = self._pop_top(heap)
+            if start is None:
+                break
+            path: List[str] = self._trace_path(start)
+            contig: str = self._concat_path(path)
+            t = timer.lap("contig.path", t)
+            invalidated: Set[str] = self._delete_path(path)
+            t = timer.lap("contig.delete", t)
+            self._push_depths(heap, invalidated)
+            timer.lap("contig.recompute", t)
+            found += 1
+            yield contig
+            t = timer.now()
+
+    def _fill_depths(self) -> None:
+        for kmer in self.nodes.keys():
+            self._get_depth(kmer)
+
+    def _top_heap(self) -> _TopHeap:
+        """Heap every node by (-depth, graph order); depths must be filled in."""
+        keys: List[str] = list(self.nodes.keys())
+        heap: _TopHeap = _TopHeap(keys)
+        # -depth in the high bits, rank in the low 32
+        heap.entries = [-self.nodes[kmer].depth << 32 | i for i, kmer in enumerate(keys)]
+        heapq.heapify(heap.entries)
+        return heap
+
+    def _pop_top(self, heap: _TopHeap) -> Optional[str]:
+        """Start of the deepest remaining path, skipping stale entries; None when empty."""
+        while heap.entries:
+            entry: int = heapq.heappop(heap.entries)
+            start: str = heap.keys[entry & 0xFFFFFFFF]
+            node: Optional[Node] = self.nodes.get(start)
+            if node is not None and node.visited and node.depth == -(entry >> 32):
+                return start
+        return None
+
+    def _push_depths(self, heap: _TopHeap, kmers: Set[str]) -> None:
+        """Recompute the depths of kmers in graph order and heap them again."""
+        for kmer in sorted(kmers, key=heap.rank.__getitem__):
+            heapq.heappush(heap.entries, -self._get_depth(kmer) << 32 | heap.rank[kmer])
+
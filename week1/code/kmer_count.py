@@ -0,0 +1,142 @@
+from typing import Iterable, List, Tuple
+import numpy as np
+
+from utils import iter_base_batches
+
+# ASCII -> 2-bit code; anything outside ACGT maps to INVALID
+INVALID: int = 255
+_LOOKUP: np.ndarray = np.full(256, INVALID, dtype=np.uint8)
+for _code, _base in enumerate('ACGT'):
+    _LOOKUP[ord(_base)] = _code
+
+# bases per count_batch call; a batch peaks at roughly 180 bytes per base
+BATCH_BASES: int = 1 << 21
+
+CountTable = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def encode_reads(reads: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatenate reads into one uint8 array of 2-bit codes plus read lengths.
+
+    Raises ValueError if a read holds anything but A, C, G and T.
+    """
+    lengths: np.ndarray = np.fromiter((len(r) for r in reads), dtype=np.int64, count=len(reads))
+    codes: np.ndarray = _LOOKUP[np.frombuffer(''.join(reads).encode('ascii'), dtype=np.uint8)]
+    if (codes == INVALID).any():
+        raise ValueError("reads may only contain A, C, G and T")
+    return codes, lengths
+
+
+def window_codes(codes: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Forward and reverse-complement k-mer codes for every window start.
+
+    Windows that straddle two reads are computed too; callers only index
+    windows that lie inside a read.
+    """
+    n: int = len(codes) - k + 1
+    wide: np.ndarray = codes.astype(np.uint64)
+    fwd: np.ndarray = np.zeros(n, dtype=np.uint64)
+    rev: np.ndarray = np.zeros(n, dtype=np.uint64)
+    for j in range(k):
+        fwd = (fwd << np.uint64(2)) | wide[j:j + n]
+        rev |= (np.uint64(3) - wide[j:j + n]) << np.uint64(2 * j)
+    return fwd, rev
+
+
+def _first_occurrence_counts(occurrences: np.ndarray, offset: int) -> CountTable:
+    # np.unique(return_index=True) needs a stable sort, which is several
+    # times slower on uint64 than an unstable argsort plus a min-reduction
+    order: np.ndarray = occurrences.argsort()
+    ordered: np.ndarray = occurrences[order]
+    starts: np.ndarray = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    counts: np.ndarray = np.diff(np.r_[starts, len(ordered)])
+    first: np.ndarray = np.minimum.reduceat(order, starts)
+    return ordered[starts], first.astype(np.int64) + offset, counts.astype(np.int64)
+
+
+def _merge(tables: List[CountTable]) -> CountTable:
+    """Merge per-batch tables and order the result by first occurrence."""
+    codes: np.ndarray = np.concatenate([t[0] for t in tables])
+    first: np.ndarray = np.concatenate([t[1] for t in tables])
+    counts: np.ndarray = np.concatenate([t[2] for t in tables])
+    # as in _first_occurrence_counts, an unstable sort plus reductions
+    # beats a lexsort on (codes, first)
+    order: np.ndarray = codes.argsort()
+    codes, first, counts = codes[order], first[order], counts[order]
+    starts: np.ndarray = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    codes = codes[starts]
+    first = np.minimum.reduceat(first, starts)
+    counts = np.add.reduceat(counts, starts)
+    # first occurrences are distinct, so this order is unique
+    order = first.argsort()
+    return codes[order], first[order], counts[order]
+
+
+def _fold(tables: List[CountTable], table: CountTable) -> List[CountTable]:
+    """Add a batch table, merging once the batch tables outgrow the merged first one.
+
+    Batches repeat most of each other's k-mers, so this keeps the held
+    tables near the size of the final table instead of growing per batch.
+    """
+    tables = tables + [table]
+    if len(tables) > 2 and sum(len(t[0]) for t in tables[1:]) >= len(tables[0][0]):
+        return [_merge(tables)]
+    return tables
+
+
+def count_batch(reads: List[str], k: int, offset: int = 0) -> Tuple[CountTable, CountTable]:
+    """Count k-mer and (k+1)-mer edge occurrences of one batch of reads.
+
+    Occurrences are laid out in the order DBG._build visits them (for each
+    arc: forward k-mer pair, then reverse-complement pair), so the first
+    occurrence index of every k-mer and edge reproduces the serial
+    insertion order. offset shifts those indices for later batches.
+    """
+    empty: CountTable = (np.zeros(0, np.uint64), np.zeros(0, np.int64), np.zeros(0, np.int64))
+    reads = [r for r in reads if len(r) > k]
+    if not reads:
+        return empty, empty
+    codes, lengths = encode_reads(reads)
+    fwd, rev = window_codes(codes, k)
+
+    arcs_per_read: np.ndarray = lengths - k
+    read_start: np.ndarray = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    arc_start: np.ndarray = np.concatenate(([0], np.cumsum(arcs_per_read)[:-1]))
+    arc_read: np.ndarray = np.repeat(np.arange(len(reads)), arcs_per_read)
+    i: np.ndarray = np.arange(int(arcs_per_read.sum())) - arc_start[arc_read]
+    pos: np.ndarray = read_start[arc_read] + i
+    # rc[i:i+k] of a read is the reverse complement of its window L - k - i
+    rc_pos: np.ndarray = read_start[arc_read] + lengths[arc_read] - k - i
+
+    f1, f2 = fwd[pos], fwd[pos + 1]
+    r1, r2 = rev[rc_pos], rev[rc_pos - 1]
+    nodes: np.ndarray = np.stack([f1, f2, r1, r2], axis=1).ravel()
+    two: np.uint64 = np.uint64(2)
+    three: np.uint64 = np.uint64(3)
+    edges: np.ndarray = np.stack([(f1 << two) | (f2 & three),
+                                  (r1 << two) | (r2 & three)], axis=1).ravel()
+    return _first_occurrence_counts(nodes, 4 * offset), _first_occurrence_counts(edges, 2 * offset)
+
+
+def count_kmers(data_list: List[Iterable[str]], k: int,
+                batch_bases: int = BATCH_BASES) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Count k-mers and edges of all reads in batches of about batch_bases bases.
+
+    Each entry of data_list may be a read list or a lazy utils.ReadStream.
+    Returns (k-mer codes, k-mer counts, edge codes) in first-occurrence
+    order, ready for dbg_kmer_as_int.DBG.from_counts.
+    """
+    node_tables: List[CountTable] = []
+    edge_tables: List[CountTable] = []
+    arcs_seen: int = 0
+    for data in data_list:
+        for batch in iter_base_batches(iter(data), batch_bases):
+            node_table, edge_table = count_batch(batch, k, arcs_seen)
+            node_tables = _fold(node_tables, node_table)
+            edge_tables = _fold(edge_tables, edge_table)
+            arcs_seen += sum(len(r) - k for r in batch if len(r) > k)
+    if not node_tables:
+        return np.zeros(0, np.uint64), np.zeros(0, np.int64), np.zeros(0, np.uint64)
+    kmers, _, counts = _merge(node_tables)
+    edges, _, _ = _merge(edge_tables)
+    return kmers, counts, edges
@@ -0,0 +1,57 @@
+from collections import Counter
+from typing import Iterable, List, Optional, Set, Tuple
+
+from dbg_kmer_as_int import iter_read_codes
+
+
+def count_occurrences(data_list: List[Iterable[str]], k: int) -> Counter:
+    """Count every k-mer occurrence on both strands (first pass).
+
+    Counts are strand-symmetric: a k-mer and its reverse complement always
+    have the same count.
+    """
+    counts: Counter = Counter()
+    for data in data_list:
+        for fwd, rev in iter_read_codes(data, k):
+            counts.update(fwd)
+            counts.update(rev)
+    return counts
+
+
+def count_histogram(counts: Counter) -> List[int]:
+    """hist[c] = number of distinct k-mers seen exactly c times."""
+    by_count: Counter = Counter(counts.values())
+    hist: List[int] = [0] * (max(by_count, default=0) + 1)
+    for count, n in by_count.items():
+        hist[count] = n
+    return hist
+
+
+def auto_threshold(hist: List[int]) -> int:
+    """Minimum count of a solid k-mer, read off the count histogram.
+
+    Error k-mers pile up at low counts and fall off quickly, while genomic
+    k-mers form a peak around the coverage. The first valley between the
+    two is the cutoff; if the histogram never turns upwards there is no
+    error peak to separate and everything is kept.
+    """
+    for count in range(1, len(hist) - 1):
+        if hist[count + 1] > hist[count]:
+            return count
+    return 1
+
+
+def solid_kmers(data_list: List[Iterable[str]], k: int,
+                min_count: Optional[int] = None) -> Tuple[Set[int], int]:
+    """Codes of all k-mers seen at least min_count times, and the cutoff used.
+
+    min_count defaults to auto_threshold() of the data's own histogram.
+    Only the solid set is kept, so the full count table can be freed
+    before the graph is built from it (second pass).
+    """
+    counts: Counter = count_occurrences(data_list, k)
+    if min_count is None:
+        min_count = auto_threshold(count_histogram(counts))
+    solid: Set[int] = {code for code, count in counts.items() if count >= min_count}
+    return solid, min_count
+
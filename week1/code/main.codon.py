@@ -1,9 +1,42 @@
 from dbg_kmer_as_key import DBG
-from utils import read_data
-from typing import List, Optional, Dict
+from typing import List, Dict
+import os
 import sys
 import time
 
+# utils.iter_reads handles gzip and FASTQ through Python-only file objects,
+# so the Codon build keeps its own plain-FASTA reader
+SHORT_LIBRARIES: List[str] = ["short_1.fasta", "short_2.fasta"]
+LONG_LIBRARY: str = "long.fasta"
+
+def read_fasta(path: str, name: str) -> List[str]:
+    """Reads of path/name, upper-cased like seqops.normalize in the Python build."""
+    data: List[str] = []
+    parts: List[str] = []
+    with open(path + "/" + name, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith(">"):
+                if parts:
+                    data.append("".join(parts).upper())
+                    parts = []
+            else:
+                parts.append(line)
+    if parts:
+        data.append("".join(parts).upper())
+    print(name, len(data), len(data[0]) if data else 0)
+    return data
+
+def read_data(path: str) -> List[List[str]]:
+    """Short read libraries, plus the long reads if the dataset has them."""
+    data_list: List[List[str]] = [read_fasta(path, name) for name in SHORT_LIBRARIES]
+    # data4 has no long reads
+    if os.path.exists(path + "/" + LONG_LIBRARY):
+        data_list.append(read_fasta(path, LONG_LIBRARY))
+    return data_list
+
 def compute_N50_from_lengths(lengths: List[int]) -> str:
     """Compute N50 from a list of contig lengths (memory-only)."""
     if not lengths:
@@ -34,16 +67,10 @@ def process_dataset(dataset_path: str, dataset_name: str) -> Dict[str, str]:
     """Process a dataset entirely in memory and return metrics."""
     start_time = time.time()
     try:
-        short1, short2, long1 = read_data(dataset_path)
-        dbg = DBG(k=25, data_list=[short1, short2, long1])
+        dbg = DBG(k=25, data_list=read_data(dataset_path))
 
         # Generate up to 20 longest contigs in memory
-        contigs: List[str] = []
-        for _ in range(20):
-            c: Optional[str] = dbg.get_longest_contig()
-            if c is None:
-                break
-            contigs.append(c)
+        contigs: List[str] = dbg.get_top_contigs(20)
 
         # Compute N50 in memory
         contig_lengths = [len(c) for c in contigs]
@@ -1,24 +1,40 @@
-from dbg_kmer_as_key import DBG
-from utils import read_data
-import sys
-from typing import List, Dict
+from assembly_stats import LengthStats, assembly_stats
+from dbg_kmer_as_int import DBG, snapshot_key
+from kmer_filter import solid_kmers
+import dbg_array
+import dbg_canonical
+from parallel_build import build_parallel
+from profiling import StageTimer
+from read_store import ReadStore, open_data, open_store
+from scaffold import scaffold, scaffold_pairs
+from utils import ReadStream, discover_reads
+from writers import FastaWriter, write_gfa
+import argparse
+import os
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Iterable, List, Dict, Optional, Tuple
+import json
 import time
 from datetime import datetime
 
-sys.setrecursionlimit(1000000)
+K: int = 25
+# Peak RSS per byte of read files, measured on default single-k runs (one
+# dataset per process): data1 178, data2 521, data3 819, data4 331. The
+# default covers the worst of these; --memory-per-byte overrides it.
+MEMORY_PER_INPUT_BYTE: int = 850
+# (stage, Markdown column) pairs reported with --profile
+PROFILE_COLUMNS: List[Tuple[str, str]] = [
+    ("read", "Read (s)"), ("build", "Build (s)"), ("compact", "Compact (s)"),
+    ("simplify", "Simplify (s)"), ("contig.reset", "Reset (s)"), ("contig.depth", "Depth (s)"),
+    ("contig.heap", "Heap (s)"), ("contig.path", "Path (s)"), ("contig.delete", "Delete (s)"),
+    ("contig.recompute", "Recompute (s)"), ("contigs", "Contigs (s)"), ("n50", "N50 (s)"),
+]
 
 def compute_N50_from_lengths(lengths: List[int]) -> str:
-    """Compute N50 from a list of contig lengths (in memory)."""
-    if not lengths:
-        return "NA"
-    lengths.sort(reverse=True)
-    total_len = sum(lengths)
-    cum_len = 0
-    for l in lengths:
-        cum_len += l
-        if cum_len >= total_len / 2:
-            return str(l)
-    return "NA"
+    """Compute N50 from a list of contig lengths (see assembly_stats)."""
+    n50: int = LengthStats(lengths).summary().get("N50", 0)
+    return str(n50) if n50 else "NA"
 
 def format_hms(seconds: float) -> str:
     """Convert seconds to h:mm:ss format."""
@@ -28,29 +44,263 @@ def format_hms(seconds: float) -> str:
     ss = seconds % 60
     return f"{hh}:{mm:02}:{ss:02}"
 
-def process_dataset(dataset_path: str, dataset_name: str) -> Dict[str, str]:
-    """Process a dataset entirely in memory and return metrics."""
-    start_time = time.time()
+def _stage(timer: Optional[StageTimer], name: str):
+    """timer.stage(name), or a no-op when not profiling."""
+    return timer.stage(name) if timer else nullcontext()
+
+def build_graph(data_list: List[Iterable[str]], canonical: bool, vectorized: bool,
+                build_workers: int = 1, array_backend: bool = False,
+                min_count: Optional[str] = None, simplify: bool = False, k: int = K,
+                timer: Optional[StageTimer] = None):
+    """Build the de Bruijn graph with the selected engine.
+
+    min_count ("auto" or a number) builds from solid k-mers only, in two
+    passes over the reads; simplify clips tips and pops bubbles after
+    compaction.
+    """
+    with _stage(timer, "build"):
+        if min_count is not None:
+            solid, cutoff = solid_kmers(data_list, k, None if min_count == "auto" else int(min_count))
+            print(f"Solid k-mers: {len(solid)} (count >= {cutoff})")
+            dbg = DBG(k=k, data_list=data_list, solid=solid)
+            del solid
+        elif canonical:
+            dbg = dbg_canonical.DBG(k=k, data_list=data_list)
+        elif array_backend:
+            dbg = dbg_array.DBG(k=k, data_list=data_list)
+        elif vectorized:
+            # NumPy is only needed for this path
+            from kmer_count import count_kmers
+            kmers, counts, edges = count_kmers(data_list, k=k)
+            dbg = DBG.from_counts(k, kmers.tolist(), counts.tolist(), edges.tolist())
+        elif build_workers > 1:
+            dbg = build_parallel(data_list, k=k, workers=build_workers)
+        else:
+            dbg = DBG(k=k, data_list=data_list)
+    if timer:
+        timer.count_graph("build", dbg)
+    if canonical or array_backend:
+        return dbg
+    # Traverse unitigs rather than single k-mers
+    with _stage(timer, "compact"):
+        dbg.compact()
+    if timer:
+        timer.count_graph("compact", dbg)
+    if simplify:
+        with _stage(timer, "simplify"):
+            stats = dbg.simplify()
+        if timer:
+            timer.count_graph("simplify", dbg)
+        print(f"Simplified graph: {stats['tips']} tips, {stats['bubbles']} bubble branches, "
+              f"{stats['nodes_removed']} k-mers and {stats['edges_removed']} edges removed")
+    return dbg
+
+def load_or_build_graph(dataset_path: str, dataset_name: str, canonical: bool,
+                        vectorized: bool, build_workers: int, use_read_store: bool,
+                        snapshot_dir: Optional[str], array_backend: bool = False,
+                        min_count: Optional[str] = None, simplify: bool = False,
+                        k: int = K, extra_reads: Optional[List[str]] = None,
+                        hybrid: bool = False, timer: Optional[StageTimer] = None):
+    """Reuse a graph snapshot for unchanged inputs, otherwise build (and save) one.
+
+    extra_reads (e.g. contigs from a smaller k) are added to the dataset's
+    reads; such graphs are never cached. In hybrid mode the long reads are
+    left out of the graph (see assemble_contigs).
+    """
+    libraries: Dict[str, str] = discover_reads(dataset_path)
+    if hybrid:
+        libraries.pop("long", None)
+    snapshot_path: Optional[str] = None
+    if snapshot_dir and not canonical and not array_backend and extra_reads is None:
+        key = snapshot_key([f"{dataset_path}/{name}" for name in libraries.values()], k)
+        suffix = f"-m{min_count}" if min_count is not None else ""
+        suffix += "-s" if simplify else ""
+        suffix += "-h" if hybrid else ""
+        snapshot_path = os.path.join(snapshot_dir, f"{dataset_name}-k{k}{suffix}-{key}.dbg")
+        if os.path.exists(snapshot_path):
+            print(f"Loading graph snapshot {snapshot_path}")
+            with _stage(timer, "load"):
+                return DBG.load(snapshot_path)
+    # Stream each library from disk while the graph is built, so parsing
+    # time is part of the build stage (read store conversion is not)
+    with _stage(timer, "read"):
+        open_reads = open_store if use_read_store else ReadStream
+        data_list: List[Iterable[str]] = [open_reads(dataset_path, name)
+                                          for name in libraries.values()]
+    if extra_reads:
+        data_list.append(extra_reads)
     try:
-        print(f"Processing {dataset_name}...")
-        # Read reads
-        short1, short2, long1 = read_data(dataset_path)
-        dbg = DBG(k=25, data_list=[short1, short2, long1])
+        dbg = build_graph(data_list, canonical, vectorized, build_workers,
+                          array_backend, min_count, simplify, k, timer)
+    finally:
+        # the graph holds no references into the mapped stores
+        for data in data_list:
+            if isinstance(data, ReadStore):
+                data.close()
+    if snapshot_path:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        dbg.save(snapshot_path)
+    return dbg
 
-        # Generate contigs in memory (up to 20 longest contigs)
+def insert_size(dataset_path: str) -> Tuple[int, float]:
+    """(pair_distance, standard_deviation) from the dataset's param.json, or (500, 0)."""
+    try:
+        with open(os.path.join(dataset_path, "param.json")) as f:
+            params: Dict[str, Any] = json.load(f)
+    except FileNotFoundError:
+        params = {}
+    return int(params.get("pair_distance", 500)), float(params.get("standard_deviation", 0))
+
+def assemble_contigs(dataset_path: str, dataset_name: str, graph_options: Dict[str, Any],
+                     k: int = K, extra_reads: Optional[List[str]] = None,
+                     timer: Optional[StageTimer] = None) -> Tuple[List[str], List[str]]:
+    """Build (or load) the graph for one k and extract up to 20 longest contigs.
+
+    With the "paired" option the contigs are then scaffolded with the
+    short read pairs. In hybrid mode the graph holds short reads only, and
+    the long reads are used afterwards to scaffold the contigs. Returns
+    (contigs, scaffolds); without scaffolding both are the same list.
+
+    With "output_dir", contigs are written to <dataset>-k<k>.contigs.fasta
+    as they are extracted, scaffolds (if any) to .scaffolds.fasta, and with
+    "gfa" the graph as it is before extraction to .gfa.
+    """
+    graph_options = dict(graph_options)
+    paired: bool = graph_options.pop("paired", False)
+    output_dir: Optional[str] = graph_options.pop("output_dir", None)
+    gfa: bool = graph_options.pop("gfa", False)
+    prefix: Optional[str] = os.path.join(output_dir, f"{dataset_name}-k{k}") if output_dir else None
+    dbg = load_or_build_graph(dataset_path, dataset_name, k=k, extra_reads=extra_reads,
+                              timer=timer, **graph_options)
+    if prefix and gfa:
+        with _stage(timer, "gfa"):
+            write_gfa(dbg, prefix + ".gfa", k)
+    with _stage(timer, "contigs"):
         contigs: List[str] = []
-        for i in range(20):
-            c = dbg.get_longest_contig()
-            if c is None:
-                break
-            contigs.append(c)
+        with FastaWriter(prefix + ".contigs.fasta") if prefix else nullcontext() as writer:
+            for contig in dbg.iter_top_contigs(20, timer):
+                contigs.append(contig)
+                if writer:
+                    writer.add(contig)
+    if timer:
+        timer.count_graph("contig.delete", dbg)
+    libraries: Dict[str, str] = discover_reads(dataset_path)
+    scaffolds: List[str] = contigs
+    if paired and "short_1" in libraries and "short_2" in libraries:
+        with _stage(timer, "scaffold.pairs"):
+            pairs = zip(ReadStream(dataset_path, libraries["short_1"]),
+                        ReadStream(dataset_path, libraries["short_2"]))
+            scaffolds = scaffold_pairs(scaffolds, pairs, *insert_size(dataset_path), k=k)
+    long_reads: Optional[str] = libraries.get("long")
+    if graph_options.get("hybrid") and long_reads:
+        with _stage(timer, "scaffold"):
+            scaffolds = scaffold(scaffolds, ReadStream(dataset_path, long_reads))
+    if prefix and (paired or graph_options.get("hybrid")):
+        with FastaWriter(prefix + ".scaffolds.fasta") as writer:
+            for i, seq in enumerate(scaffolds):
+                writer.add(seq, f"scaffold_{i} len={len(seq)}")
+    return contigs, scaffolds
+
+def _assemble_k(dataset_path: str, dataset_name: str, graph_options: Dict[str, Any],
+                k: int) -> Tuple[List[int], float]:
+    """Worker for assemble_multi_k: contig lengths and runtime for one k."""
+    start_time = time.time()
+    _, scaffolds = assemble_contigs(dataset_path, dataset_name, graph_options, k)
+    return [len(s) for s in scaffolds], time.time() - start_time
+
+def assemble_multi_k(dataset_path: str, dataset_name: str, graph_options: Dict[str, Any],
+                     k_values: List[int], k_workers: int = 1,
+                     merge: bool = False) -> Dict[int, Tuple[List[int], float]]:
+    """Assemble a dataset once per k; returns {k: (contig lengths, runtime)}.
 
+    Independent k values run in up to k_workers processes that all map the
+    same read store, which is converted once up front. With merge, k values
+    run in increasing order instead, and each k also sees the contigs of the
+    previous one as extra reads (iterative multi-k, as in IDBA). Those are
+    the contigs before scaffolding: gaps are padded with N, which is not a
+    k-mer base. Reported lengths are those of the scaffolds.
+    """
+    graph_options = dict(graph_options, use_read_store=True)
+    for store in open_data(dataset_path):
+        store.close()
+    results: Dict[int, Tuple[List[int], float]] = {}
+    if merge:
+        contigs: Optional[List[str]] = None
+        for k in sorted(k_values):
+            start_time = time.time()
+            contigs, scaffolds = assemble_contigs(dataset_path, dataset_name, graph_options,
+                                                  k, contigs)
+            results[k] = [len(s) for s in scaffolds], time.time() - start_time
+        return results
+    with ProcessPoolExecutor(max_workers=min(k_workers, len(k_values))) as pool:
+        futures = {k: pool.submit(_assemble_k, dataset_path, dataset_name, graph_options, k)
+                   for k in k_values}
+        for k, future in futures.items():
+            results[k] = future.result()
+    return results
 
-        # Compute N50 in memory
-        contig_lengths = [len(c) for c in contigs]
-        N50 = compute_N50_from_lengths(contig_lengths)
+def process_dataset(dataset_path: str, dataset_name: str, canonical: bool = False,
+                    vectorized: bool = False, build_workers: int = 1,
+                    use_read_store: bool = False,
+                    snapshot_dir: Optional[str] = None,
+                    array_backend: bool = False,
+                    min_count: Optional[str] = None,
+                    simplify: bool = False,
+                    k_values: Optional[List[int]] = None,
+                    k_workers: int = 1,
+                    merge_k: bool = False,
+                    hybrid: bool = False,
+                    paired: bool = False,
+                    output_dir: Optional[str] = None,
+                    gfa: bool = False,
+                    reference: Optional[str] = None,
+                    profile: bool = False,
+                    trace_memory: bool = False) -> Dict[str, Any]:
+    """Process a dataset entirely in memory and return metrics.
 
-        metrics: Dict[str, str] = {
+    With k_values, every k is assembled (see assemble_multi_k), the k with
+    the best N50 is reported, and per-k N50 and runtime columns are added.
+    With profile (single k only), per-stage timings, peak memory and graph
+    sizes are added as PROFILE_COLUMNS and, in full, under "Profile".
+    """
+    start_time = time.time()
+    graph_options: Dict[str, Any] = dict(
+        canonical=canonical, vectorized=vectorized, build_workers=build_workers,
+        use_read_store=use_read_store, snapshot_dir=snapshot_dir,
+        array_backend=array_backend, min_count=min_count, simplify=simplify, hybrid=hybrid,
+        paired=paired, output_dir=output_dir, gfa=gfa)
+    per_k: Dict[str, str] = {}
+    stats: Dict[str, Any] = {}
+    timer: Optional[StageTimer] = StageTimer(trace_memory) if profile and not k_values else None
+    try:
+        print(f"Processing {dataset_name}...")
+        if k_values:
+            by_k = assemble_multi_k(dataset_path, dataset_name, graph_options, k_values,
+                                    k_workers, merge_k)
+            best_k, best_N50 = K, "NA"
+            for k in k_values:
+                lengths, seconds = by_k[k]
+                N50_k = compute_N50_from_lengths(lengths)
+                per_k[f"N50 (k={k})"] = N50_k
+                per_k[f"Runtime (k={k})"] = format_hms(seconds)
+                if N50_k != "NA" and (best_N50 == "NA" or int(N50_k) > int(best_N50)):
+                    best_k, best_N50 = k, N50_k
+            per_k["Best_k"] = str(best_k)
+            N50 = best_N50
+        else:
+            # Generate contigs in memory (up to 20 longest contigs)
+            _, contigs = assemble_contigs(dataset_path, dataset_name, graph_options, timer=timer)
+
+            # N50 and friends; genome fraction and duplication need a reference
+            with _stage(timer, "n50"):
+                ref_path: Optional[str] = os.path.join(dataset_path, reference) if reference else None
+                if ref_path and not os.path.exists(ref_path):
+                    print(f"{dataset_name}: no reference {ref_path}")
+                    ref_path = None
+                stats = assembly_stats(contigs, ref_path, K)
+                N50 = str(stats["N50"]) if stats.get("N50") else "NA"
+
+        metrics: Dict[str, Any] = {
             "Dataset": dataset_name,
             "Rank": "NA",  
             "Submission_Time": datetime.now().strftime("%Y/%m/%d %I:%M:%S%p"),
@@ -61,6 +311,11 @@ def process_dataset(dataset_path: str, dataset_name: str) -> Dict[str, str]:
             "Misassemblies": "NA",
             "Mismatches per 100kbp": "NA",
         }
+        if stats:
+            if "genome_fraction" in stats:
+                metrics["Genome_Fraction(%)"] = f"{stats['genome_fraction']:.3f}"
+                metrics["Duplication ratio"] = f"{stats['duplication_ratio']:.3f}"
+            metrics["Stats"] = stats
 
     except Exception as e:
         print(f"Error processing {dataset_name}: {e}")
@@ -78,30 +333,180 @@ def process_dataset(dataset_path: str, dataset_name: str) -> Dict[str, str]:
     end_time = time.time()
     runtime_hms = format_hms(end_time - start_time)
     metrics["Runtime"] = runtime_hms
+    metrics.update(per_k)
+    if timer:
+        timer.close()
+        for stage, column in PROFILE_COLUMNS:
+            metrics[column] = f"{timer.seconds(stage):.3f}" if stage in timer.stages else "NA"
+        report = timer.report()
+        metrics["Peak RSS (MB)"] = str(max((row["peak_rss_mb"] for row in report), default="NA"))
+        built = timer.stages.get("build")
+        metrics["Nodes"] = str(built.nodes) if built and built.nodes is not None else "NA"
+        metrics["Edges"] = str(built.edges) if built and built.edges is not None else "NA"
+        metrics["Profile"] = report
 
     # Print per-dataset runtime immediately
     print(f"{dataset_name} completed in {runtime_hms}")
 
     return metrics
 
+def dataset_size(dataset_path: str) -> int:
+    """Total size of a dataset's read files in bytes (0 if it has none)."""
+    try:
+        libraries = discover_reads(dataset_path)
+    except FileNotFoundError:
+        return 0
+    return sum(os.path.getsize(f"{dataset_path}/{name}") for name in libraries.values())
+
+def available_memory() -> int:
+    """Memory the OS can hand out without swapping, in bytes."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_AVPHYS_PAGES")
+
+def run_datasets(data_root: str, datasets: List[str], jobs: int = 1,
+                 memory_budget: Optional[int] = None,
+                 memory_per_byte: int = MEMORY_PER_INPUT_BYTE,
+                 **options: Any) -> List[Dict[str, Any]]:
+    """Run process_dataset for every dataset and collect the metrics dicts.
+
+    With jobs > 1 datasets run in a process pool, largest first. A dataset
+    is only started while the estimated memory of everything running
+    (memory_per_byte per input byte, per graph built at once with
+    k_workers) stays within memory_budget, though one dataset always runs
+    even if it alone exceeds the budget.
+    """
+    if jobs <= 1:
+        return [process_dataset(f"{data_root}/{dataset}", dataset, **options)
+                for dataset in datasets]
+    if memory_budget is None:
+        memory_budget = available_memory() * 4 // 5
+    k_values: Optional[List[int]] = options.get("k_values")
+    graphs: int = 1
+    if k_values and not options.get("merge_k"):
+        graphs = min(options.get("k_workers", 1), len(k_values))
+    estimates: Dict[str, int] = {
+        dataset: dataset_size(f"{data_root}/{dataset}") * memory_per_byte * graphs
+        for dataset in datasets}
+    pending: List[str] = sorted(datasets, key=estimates.__getitem__, reverse=True)
+    running: Dict[Future, int] = {}
+    results: List[Dict[str, Any]] = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            while pending and len(running) < jobs:
+                in_use: int = sum(running.values())
+                fits: List[str] = [d for d in pending if in_use + estimates[d] <= memory_budget]
+                if running and not fits:
+                    break
+                dataset: str = fits[0] if fits else pending[0]
+                pending.remove(dataset)
+                print(f"Starting {dataset} (estimated {estimates[dataset] // 2**20} MB)")
+                future = pool.submit(process_dataset, f"{data_root}/{dataset}", dataset, **options)
+                running[future] = estimates[dataset]
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                del running[future]
+                results.append(future.result())
+    return results
+
 def main() -> None:
-    if len(sys.argv) < 2:
-        print("Usage: python main.py <data_root>")
-        return
+    parser = argparse.ArgumentParser(description="Assemble data1-data4 with a de Bruijn graph.")
+    parser.add_argument("data_root", help="directory containing data1..data4")
+    parser.add_argument("--canonical", action="store_true",
+                        help="store each k-mer and its reverse complement as one node")
+    parser.add_argument("--array", action="store_true",
+                        help="keep the graph in typed arrays (less memory, no unitig compaction)")
+    parser.add_argument("--vectorized", action="store_true",
+                        help="count k-mers with NumPy before building the graph")
+    parser.add_argument("--build-workers", type=int, default=1,
+                        help="processes used to build each graph (default: 1)")
+    parser.add_argument("--read-store", action="store_true",
+                        help="read from packed, memory-mapped copies of the FASTA files "
+                             "(created next to them on first use)")
+    parser.add_argument("--snapshot-dir",
+                        help="cache compacted graphs here and reuse them while the inputs are unchanged")
+    parser.add_argument("--min-count", metavar="N|auto",
+                        help="drop k-mers seen fewer than N times before building the graph; "
+                             "'auto' picks N from the k-mer count histogram")
+    parser.add_argument("--simplify", action="store_true",
+                        help="clip tips and pop bubbles before extracting contigs")
+    parser.add_argument("--k-values", metavar="K1,K2,...",
+                        type=lambda v: [int(k) for k in v.split(",")],
+                        help="assemble every dataset with each k and keep the best N50")
+    parser.add_argument("--k-workers", type=int, default=1,
+                        help="processes assembling different k values at once (default: 1)")
+    parser.add_argument("--merge-k", action="store_true",
+                        help="with --k-values, run k in increasing order and feed each k "
+                             "the contigs of the previous one")
+    parser.add_argument("--hybrid", action="store_true",
+                        help="build the graph from short reads only and scaffold the contigs "
+                             "with long reads")
+    parser.add_argument("--paired", action="store_true",
+                        help="scaffold the contigs with short read pairs, using the insert "
+                             "size from param.json")
+    parser.add_argument("--output-dir", metavar="DIR",
+                        help="write each dataset's contigs (and scaffolds) as FASTA to DIR")
+    parser.add_argument("--gfa", action="store_true",
+                        help="with --output-dir, also write the compacted graph as GFA")
+    parser.add_argument("--reference", metavar="FILE",
+                        help="reference genome inside each dataset directory (e.g. genome.fasta "
+                             "from simulate.py); fills Genome_Fraction(%%) and Duplication ratio")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="datasets processed at once, largest first (default: 1)")
+    parser.add_argument("--memory-budget", type=int, metavar="MB",
+                        help="with --jobs, only start a dataset while the estimated memory of "
+                             "running ones fits (default: 80%% of available memory)")
+    parser.add_argument("--memory-per-byte", type=int, default=MEMORY_PER_INPUT_BYTE, metavar="N",
+                        help="with --jobs, estimated peak memory per byte of read files "
+                             f"(default: {MEMORY_PER_INPUT_BYTE})")
+    parser.add_argument("--json", metavar="PATH",
+                        help="also write the per-dataset metrics to PATH as JSON")
+    parser.add_argument("--profile", action="store_true",
+                        help="time each stage and report peak memory and graph sizes "
+                             "(Markdown columns, full report as JSON)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="with --profile, also measure each stage's Python allocation "
+                             "peak with tracemalloc (slow)")
+    args = parser.parse_args()
+    if args.min_count is not None and (args.canonical or args.array or args.vectorized
+                                       or args.build_workers > 1):
+        parser.error("--min-count only works with the default serial builder")
+    if args.simplify and (args.canonical or args.array):
+        parser.error("--simplify needs the compacted graph (not --canonical or --array)")
+    if args.gfa and (args.canonical or not args.output_dir):
+        parser.error("--gfa needs --output-dir and does not support --canonical")
+    if args.profile and args.k_values:
+        parser.error("--profile times a single k and does not support --k-values")
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
 
-    data_root: str = sys.argv[1]
+    data_root: str = args.data_root
     datasets: List[str] = sorted(["data1", "data2", "data3", "data4"])
-    results: List[Dict[str, str]] = []
-
-    for dataset in datasets:
-        dataset_path: str = f"{data_root}/{dataset}"
-        metrics = process_dataset(dataset_path, dataset)
-        results.append(metrics)
+    results: List[Dict[str, Any]] = run_datasets(
+        data_root, datasets, jobs=args.jobs,
+        memory_budget=args.memory_budget * 2**20 if args.memory_budget else None,
+        memory_per_byte=args.memory_per_byte,
+        canonical=args.canonical, vectorized=args.vectorized,
+        build_workers=args.build_workers, use_read_store=args.read_store,
+        snapshot_dir=args.snapshot_dir, array_backend=args.array,
+        min_count=args.min_count, simplify=args.simplify,
+        k_values=args.k_values, k_workers=args.k_workers,
+        merge_k=args.merge_k, hybrid=args.hybrid, paired=args.paired,
+        output_dir=args.output_dir, gfa=args.gfa, reference=args.reference,
+        profile=args.profile, trace_memory=args.trace_memory)
 
     ## Rank by N50 descending (NA treated as 0)
     results.sort(key=lambda x: int(x["N50"]) if x["N50"] != "NA" else 0, reverse=True)
     for rank, res in enumerate(results, 1):
         res["Rank"] = str(rank)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
 
     # Print table 
     header: List[str] = [
@@ -109,15 +514,20 @@ def main() -> None:
         "Genome_Fraction(%)", "Duplication ratio", "N50",
         "Misassemblies", "Mismatches per 100kbp", "Runtime"
     ]
+    if args.k_values:
+        header.append("Best_k")
+        for k in args.k_values:
+            header += [f"N50 (k={k})", f"Runtime (k={k})"]
+    if args.profile:
+        header += [column for _, column in PROFILE_COLUMNS]
+        header += ["Peak RSS (MB)", "Nodes", "Edges"]
     
     print("| " + " | ".join(header) + " |")
     print("|" + "|".join(["---"]*len(header)) + "|")
     for res in results:
-        print(
-            f"| {res['Rank']} | {res['Dataset']} | {res['Submission_Time']} | {res['Submission_Count']} | "
-            f"{res['Genome_Fraction(%)']} | {res['Duplication ratio']} | {res['N50']} | "
-            f"{res['Misassemblies']} | {res['Mismatches per 100kbp']} | {res['Runtime']} |"
-        )
+        print("| " + " | ".join(res.get(column, "NA") for column in header) + " |")
+    if args.profile and not args.json:
+        print(json.dumps({res["Dataset"]: res.get("Profile", []) for res in results}, indent=2))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
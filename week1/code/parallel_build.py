@@ -0,0 +1,96 @@
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+import heapq
+import os
+
+from dbg_kmer_as_int import DBG, kmer_codes, rc_kmer_codes
+from utils import iter_batches
+
+# code -> (first occurrence, count); first occurrences are chunk << RANK_BITS | rank
+Shard = Dict[int, Tuple[int, int]]
+RANK_BITS: int = 40
+
+
+def _count_chunk(reads: List[str], k: int, chunk: int,
+                 n_shards: int) -> Tuple[List[Shard], List[Shard]]:
+    """Count one chunk of reads into hash-partitioned shards.
+
+    K-mers are fed to a Counter in the order DBG._build visits them
+    (forward pair, then RC pair, arc by arc), so a key's position in the
+    Counter is its first occurrence within the chunk; prefixing it with
+    the chunk number orders keys exactly like the serial insertion order.
+    """
+    nodes: Counter = Counter()
+    edges: Counter = Counter()
+    for read in reads:
+        if len(read) <= k:
+            continue
+        fwd: List[int] = kmer_codes(read, k)
+        rev: List[int] = rc_kmer_codes(read, k)
+        rev.reverse()
+        nodes.update(chain.from_iterable(zip(fwd, fwd[1:], rev, rev[1:])))
+        fwd_edges: List[int] = [(a << 2) | (b & 3) for a, b in zip(fwd, fwd[1:])]
+        rev_edges: List[int] = [(a << 2) | (b & 3) for a, b in zip(rev, rev[1:])]
+        edges.update(chain.from_iterable(zip(fwd_edges, rev_edges)))
+    return _partition(nodes, chunk, n_shards), _partition(edges, chunk, n_shards)
+
+
+def _partition(counts: Counter, chunk: int, n_shards: int) -> List[Shard]:
+    shards: List[Shard] = [{} for _ in range(n_shards)]
+    base: int = chunk << RANK_BITS
+    for rank, (code, count) in enumerate(counts.items()):
+        shards[code % n_shards][code] = (base | rank, count)
+    return shards
+
+
+def _merge_shard(parts: List[Shard]) -> List[Tuple[int, int, int]]:
+    """Merge one shard across chunks into (first occurrence, code, count) rows.
+
+    parts must be in chunk order, so the first chunk that saw a key holds
+    its smallest first occurrence.
+    """
+    merged: Dict[int, List[int]] = {}
+    for part in parts:
+        for code, (first, count) in part.items():
+            entry: Optional[List[int]] = merged.get(code)
+            if entry is None:
+                merged[code] = [first, count]
+            else:
+                entry[1] += count
+    return sorted((first, code, count) for code, (first, count) in merged.items())
+
+
+def _chunks(data_list: List[Iterable[str]], chunk_size: int) -> Iterator[List[str]]:
+    """Split all reads, in order, into runs of chunk_size reads."""
+    reads: Iterator[str] = (read for data in data_list for read in data)
+    return iter_batches(reads, chunk_size)
+
+
+def build_parallel(data_list: List[Iterable[str]], k: int, workers: Optional[int] = None,
+                   shards: Optional[int] = None, chunk_size: int = 20000) -> DBG:
+    """Build the same graph as dbg_kmer_as_int.DBG(k, data_list) on several cores.
+
+    Reads are counted chunk-wise in worker processes into k-mer shards,
+    each shard is merged in a worker, and the merged tables are fed to
+    DBG.from_counts in serial insertion order. At most two chunks per
+    worker are in flight, so read streams are never fully loaded.
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = shards or workers
+    counted: List[Tuple[List[Shard], List[Shard]]] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: Deque = deque()
+        for chunk, reads in enumerate(_chunks(data_list, chunk_size)):
+            if len(pending) >= 2 * workers:
+                counted.append(pending.popleft().result())
+            pending.append(pool.submit(_count_chunk, reads, k, chunk, shards))
+        counted.extend(f.result() for f in pending)
+        node_merges = [pool.submit(_merge_shard, [c[0][s] for c in counted]) for s in range(shards)]
+        edge_merges = [pool.submit(_merge_shard, [c[1][s] for c in counted]) for s in range(shards)]
+        del counted
+        nodes: List[Tuple[int, int, int]] = list(heapq.merge(*(m.result() for m in node_merges)))
+        edges: List[Tuple[int, int, int]] = list(heapq.merge(*(m.result() for m in edge_merges)))
+    return DBG.from_counts(k, [node[1] for node in nodes], [node[2] for node in nodes],
+                           [edge[1] for edge in edges])
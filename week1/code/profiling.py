@@ -0,0 +1,105 @@
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+import resource
+import sys
+import time
+import tracemalloc
+
+from dbg_kmer_as_key import StepTimer
+
+
+def peak_rss() -> int:
+    """High-water mark of this process's resident set size, in bytes."""
+    rss: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+class Stage:
+    __slots__ = ('name', 'seconds', 'calls', 'peak_rss', 'peak_traced', 'nodes', 'edges')
+    name: str
+    seconds: float
+    calls: int
+    peak_rss: int
+    peak_traced: Optional[int]
+    nodes: Optional[int]
+    edges: Optional[int]
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.seconds = 0.0
+        self.calls = 0
+        self.peak_rss = 0
+        self.peak_traced = None
+        self.nodes = None
+        self.edges = None
+
+
+class StageTimer(StepTimer):
+    """Per-stage wall time, peak memory and graph size for one dataset.
+
+    Repeated stages (e.g. the per-contig contig.* steps) accumulate time
+    and calls. peak_rss is the process high-water mark when the stage ends;
+    with trace_memory, tracemalloc also gives each stage's own Python
+    allocation peak, at a sizeable slowdown. As a StepTimer, each lap of
+    iter_top_contigs is recorded as a stage.
+    """
+    stages: Dict[str, Stage]
+    trace_memory: bool
+
+    def __init__(self, trace_memory: bool = False) -> None:
+        self.stages = {}
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start: float = self.now()
+        try:
+            yield
+        finally:
+            self.lap(name, start)
+
+    def now(self) -> float:
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        return time.perf_counter()
+
+    def lap(self, step: str, start: float) -> float:
+        elapsed: float = time.perf_counter() - start
+        stage: Stage = self.stages.setdefault(step, Stage(step))
+        stage.seconds += elapsed
+        stage.calls += 1
+        stage.peak_rss = max(stage.peak_rss, peak_rss())
+        if self.trace_memory:
+            traced: int = tracemalloc.get_traced_memory()[1]
+            stage.peak_traced = max(stage.peak_traced or 0, traced)
+        return self.now()
+
+    def count_graph(self, name: str, dbg: Any) -> None:
+        """Record the graph's node and edge counts at the end of stage name."""
+        stage: Stage = self.stages.setdefault(name, Stage(name))
+        stage.nodes, stage.edges = dbg.graph_size()
+
+    def seconds(self, name: str) -> float:
+        stage: Optional[Stage] = self.stages.get(name)
+        return stage.seconds if stage else 0.0
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Stages in the order they first ran, as JSON-ready dicts."""
+        rows: List[Dict[str, Any]] = []
+        for stage in self.stages.values():
+            row: Dict[str, Any] = {"stage": stage.name, "seconds": round(stage.seconds, 6),
+                                   "calls": stage.calls,
+                                   "peak_rss_mb": round(stage.peak_rss / 2**20, 1)}
+            if stage.peak_traced is not None:
+                row["peak_traced_mb"] = round(stage.peak_traced / 2**20, 1)
+            if stage.nodes is not None:
+                row["nodes"], row["edges"] = stage.nodes, stage.edges
+            rows.append(row)
+        return rows
+
+    def close(self) -> None:
+        if self.trace_memory:
+            tracemalloc.stop()
@@ -0,0 +1,148 @@
+from array import array
+from typing import Any, BinaryIO, Iterator, List, Tuple
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+
+from seqops import pack_2bit
+from utils import discover_reads, iter_reads
+
+# Layout: header | byte offsets (uint64, n + 1) | read lengths (uint32, n) | packed bases.
+# Every read starts on a byte boundary, 4 bases per byte, first base in the high bits.
+MAGIC: bytes = b'DBGREADS'
+VERSION: int = 1
+HEADER: struct.Struct = struct.Struct('<8sIIQ')  # magic, version, reserved, n_reads
+SUFFIX: str = '.reads'
+
+# packed byte -> its four bases, as text and as 2-bit codes
+_UNPACK: List[bytes] = [bytes(b'ACGT'[(b >> s) & 3] for s in (6, 4, 2, 0)) for b in range(256)]
+_BASES: List[Tuple[int, int, int, int]] = [((b >> 6) & 3, (b >> 4) & 3, (b >> 2) & 3, b & 3)
+                                           for b in range(256)]
+
+
+def pack_read(read: str) -> bytes:
+    return pack_2bit(read)
+
+
+def convert(fasta_path: str, store_path: str) -> int:
+    """Pack every read of a FASTA/FASTQ file into a read store; returns the read count."""
+    offsets: array = array('Q', [0])
+    lengths: array = array('I')
+    with tempfile.TemporaryFile() as body:
+        for read in iter_reads(fasta_path):
+            packed: bytes = pack_read(read)
+            body.write(packed)
+            offsets.append(offsets[-1] + len(packed))
+            lengths.append(len(read))
+        body.seek(0)
+        tmp_path: str = store_path + '.tmp'
+        with open(tmp_path, 'wb') as out:
+            out.write(HEADER.pack(MAGIC, VERSION, 0, len(lengths)))
+            offsets.tofile(out)
+            lengths.tofile(out)
+            shutil.copyfileobj(body, out)
+    os.replace(tmp_path, store_path)
+    return len(lengths)
+
+
+class ReadStore:
+    """Memory-mapped 2-bit read store; behaves like a read-only list of reads."""
+    path: str
+    n: int
+    _file: BinaryIO
+    _map: mmap.mmap
+    _offsets: memoryview
+    _lengths: memoryview
+    _data: memoryview
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, n = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} read store")
+        self.n = n
+        view: memoryview = memoryview(self._map)
+        start: int = HEADER.size
+        self._offsets = view[start:start + 8 * (n + 1)].cast('Q')
+        start += 8 * (n + 1)
+        self._lengths = view[start:start + 4 * n].cast('I')
+        self._data = view[start + 4 * n:]
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, i: int) -> str:
+        return b''.join(map(_UNPACK.__getitem__, self.packed(i)))[:self._lengths[i]].decode('ascii')
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self.n):
+            yield self[i]
+
+    def packed(self, i: int) -> memoryview:
+        """Zero-copy view of read i's packed bytes."""
+        return self._data[self._offsets[i]:self._offsets[i + 1]]
+
+    def read_length(self, i: int) -> int:
+        return self._lengths[i]
+
+    def kmer_codes(self, i: int, k: int) -> Tuple[List[int], List[int]]:
+        """2-bit codes of read i's k-mers and of their reverse complements.
+
+        Same values as dbg_kmer_as_int.kmer_codes / rc_kmer_codes, taken
+        straight from the packed bytes without decoding the read.
+        """
+        length: int = self._lengths[i]
+        if length < k:
+            return [], []
+        bases: List[int] = [base for byte in self.packed(i) for base in _BASES[byte]]
+        mask: int = (1 << (2 * k)) - 1
+        shift: int = 2 * (k - 1)
+        # roll both codes base by base, seeded with the first k - 1 bases
+        code: int = 0
+        rc: int = 0
+        for base in bases[:k - 1]:
+            code = (code << 2) | base
+            rc = (rc >> 2) | ((3 - base) << shift)
+        fwd: List[int] = []
+        rev: List[int] = []
+        for base in bases[k - 1:length]:
+            code = ((code << 2) | base) & mask
+            rc = (rc >> 2) | ((3 - base) << shift)
+            fwd.append(code)
+            rev.append(rc)
+        return fwd, rev
+
+    def close(self) -> None:
+        for view in (self._offsets, self._lengths, self._data):
+            view.release()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> 'ReadStore':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def open_store(path: str, name: str) -> ReadStore:
+    """Open the read store for path/name, converting the FASTA first if needed.
+
+    The store lives next to the FASTA as name + '.reads' and is rebuilt
+    whenever the FASTA is newer.
+    """
+    fasta_path: str = path + "/" + name
+    store_path: str = fasta_path + SUFFIX
+    if (not os.path.exists(store_path)
+            or os.path.getmtime(store_path) < os.path.getmtime(fasta_path)):
+        convert(fasta_path, store_path)
+    return ReadStore(store_path)
+
+
+def open_data(path: str) -> List[ReadStore]:
+    """A memory-mapped read store for every read library in path (see utils.discover_reads)."""
+    return [open_store(path, name) for name in discover_reads(path).values()]
@@ -0,0 +1,92 @@
+from typing import Iterable, Iterator, List
+import numpy as np
+
+from kmer_count import INVALID, _LOOKUP, window_codes
+from utils import iter_reads
+
+# bases per batch; window_codes needs about 16 bytes per base
+BATCH_BASES: int = 1 << 22
+
+
+def canonical_codes(seqs: List[str], k: int) -> np.ndarray:
+    """Canonical k-mer codes of all windows of seqs that hold only ACGT.
+
+    Sequences are joined with an N, so windows across two of them are
+    dropped along with windows over gaps and other non-ACGT bases.
+    """
+    codes: np.ndarray = _LOOKUP[np.frombuffer('N'.join(seqs).upper().encode('ascii'), dtype=np.uint8)]
+    if len(codes) < k:
+        return np.zeros(0, dtype=np.uint64)
+    bad: np.ndarray = np.concatenate(([0], np.cumsum(codes == INVALID)))
+    valid: np.ndarray = bad[k:] == bad[:-k]
+    fwd, rev = window_codes(codes, k)
+    return np.minimum(fwd, rev)[valid]
+
+
+def base_batches(seqs: Iterable[str], k: int, max_bases: int = BATCH_BASES) -> Iterator[List[str]]:
+    """Group seqs into lists of about max_bases bases.
+
+    Longer sequences are cut into pieces overlapping by k - 1 bases, so
+    every k-mer still lies within one piece.
+    """
+    batch: List[str] = []
+    size: int = 0
+    for seq in seqs:
+        step: int = max_bases - k + 1
+        pieces: List[str] = [seq] if len(seq) <= max_bases else \
+            [seq[i:i + max_bases] for i in range(0, len(seq) - k + 1, step)]
+        for piece in pieces:
+            batch.append(piece)
+            size += len(piece)
+            if size >= max_bases:
+                yield batch
+                batch, size = [], 0
+    if batch:
+        yield batch
+
+
+class ReferenceKmers:
+    """Genome fraction and duplication of an assembly from shared k-mers.
+
+    The reference's distinct canonical k-mers are kept as one sorted array
+    (8 bytes each) plus a covered flag per k-mer; assembly sequences are
+    streamed through add() in batches and looked up with searchsorted.
+    Genome fraction is the share of reference k-mers found in the
+    assembly, and duplication the number of assembly k-mers that hit the
+    reference per distinct k-mer hit, the k-mer analogue of QUAST's
+    aligned bases / covered bases.
+    """
+    k: int
+    kmers: np.ndarray
+    covered: np.ndarray
+    hits: int
+
+    def __init__(self, path: str, k: int = 25) -> None:
+        self.k = k
+        chunks: List[np.ndarray] = [np.unique(canonical_codes(batch, k))
+                                    for batch in base_batches(iter_reads(path), k)]
+        self.kmers = np.unique(np.concatenate(chunks)) if chunks else np.zeros(0, dtype=np.uint64)
+        self.covered = np.zeros(len(self.kmers), dtype=bool)
+        self.hits = 0
+
+    def add(self, seqs: List[str]) -> None:
+        """Count the k-mers of one batch of assembly sequences."""
+        if not len(self.kmers):
+            return
+        codes: np.ndarray = canonical_codes(seqs, self.k)
+        pos: np.ndarray = np.minimum(np.searchsorted(self.kmers, codes), len(self.kmers) - 1)
+        found: np.ndarray = self.kmers[pos] == codes
+        self.covered[pos[found]] = True
+        self.hits += int(found.sum())
+
+    def add_all(self, seqs: Iterable[str]) -> None:
+        for batch in base_batches(seqs, self.k):
+            self.add(batch)
+
+    def genome_fraction(self) -> float:
+        """Percentage of reference k-mers present in the assembly."""
+        return 100.0 * int(self.covered.sum()) / len(self.kmers) if len(self.kmers) else 0.0
+
+    def duplication_ratio(self) -> float:
+        covered: int = int(self.covered.sum())
+        return self.hits / covered if covered else 0.0
@@ -0,0 +1,357 @@
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from seqops import reverse_complement
+from dbg_kmer_as_int import ENCODE
+
+# (hash, position, strand) of one minimizer; strand 1 means the k-mer's
+# reverse complement is the canonical one
+Minimizer = Tuple[int, int, int]
+# oriented contig: (contig index, '+' or '-')
+Oriented = Tuple[int, str]
+# contig end: (contig index, 0 = start, 1 = end of the forward sequence)
+End = Tuple[int, int]
+
+_HASH_MULT: int = 0x9E3779B97F4A7C15
+
+
+def minimizers(seq: str, k: int, w: int) -> List[Minimizer]:
+    """(w, k)-minimizers of seq over canonical k-mers.
+
+    The hash is a multiplication by an odd constant modulo 4**k, so it is
+    a bijection on k-mer codes but avoids picking poly-A runs. K-mers that
+    span a non-ACGT base are skipped.
+    """
+    mask: int = (1 << (2 * k)) - 1
+    shift: int = 2 * (k - 1)
+    fwd: int = 0
+    rc: int = 0
+    valid: int = 0
+    window: Deque[Minimizer] = deque()
+    out: List[Minimizer] = []
+    for i, c in enumerate(seq):
+        base: Optional[int] = ENCODE.get(c)
+        if base is None:
+            valid = 0
+            window.clear()
+            continue
+        fwd = ((fwd << 2) | base) & mask
+        rc = (rc >> 2) | ((3 - base) << shift)
+        valid += 1
+        if valid < k:
+            continue
+        pos: int = i - k + 1
+        if fwd != rc:  # palindromes have no strand
+            strand: int = 0 if fwd < rc else 1
+            h: int = ((rc if strand else fwd) * _HASH_MULT) & mask
+            while window and window[-1][0] > h:
+                window.pop()
+            window.append((h, pos, strand))
+        while window and window[0][1] <= pos - w:
+            window.popleft()
+        if valid >= k + w - 1 and window and (not out or out[-1] is not window[0]):
+            out.append(window[0])
+    return out
+
+
+class Mapping:
+    """Placement of one contig on a long read, in read coordinates.
+
+    start/end are where the oriented contig's first and last base would
+    fall on the read; they may lie outside the read.
+    """
+    __slots__ = ('contig', 'strand', 'start', 'end', 'anchors')
+    contig: int
+    strand: str
+    start: int
+    end: int
+    anchors: int
+
+    def __init__(self, contig: int, strand: str, start: int, end: int, anchors: int) -> None:
+        self.contig = contig
+        self.strand = strand
+        self.start = start
+        self.end = end
+        self.anchors = anchors
+
+
+class ContigIndex:
+    """Minimizer index of a contig set, used to anchor noisy long reads."""
+    k: int
+    w: int
+    lengths: List[int]
+    index: Dict[int, List[Tuple[int, int, int]]]
+
+    def __init__(self, contigs: List[str], k: int = 15, w: int = 10, max_occ: int = 8) -> None:
+        self.k = k
+        self.w = w
+        self.lengths = [len(c) for c in contigs]
+        self.index = {}
+        for cid, contig in enumerate(contigs):
+            for h, pos, strand in minimizers(contig, k, w):
+                self.index.setdefault(h, []).append((cid, pos, strand))
+        # repeats anchor everywhere and only add noise
+        for h in [h for h, hits in self.index.items() if len(hits) > max_occ]:
+            del self.index[h]
+
+    def map_read(self, read: str, min_anchors: int = 3, band: int = 100) -> List[Mapping]:
+        """Place every contig sharing at least min_anchors colinear minimizers with read.
+
+        Anchors are grouped by contig and relative strand; the group's
+        median diagonal gives the placement, and only anchors within band
+        of it count, which tolerates the indel drift of noisy reads.
+        """
+        hits: Dict[Oriented, List[int]] = {}
+        for h, i, strand in minimizers(read, self.k, self.w):
+            for cid, j, contig_strand in self.index.get(h, ()):
+                if strand == contig_strand:
+                    hits.setdefault((cid, '+'), []).append(i - j)
+                else:
+                    # position of the same k-mer on the reverse-complemented contig
+                    j = self.lengths[cid] - self.k - j
+                    hits.setdefault((cid, '-'), []).append(i - j)
+        mappings: List[Mapping] = []
+        for (cid, strand), offsets in hits.items():
+            if len(offsets) < min_anchors:
+                continue
+            offsets.sort()
+            median: int = offsets[len(offsets) // 2]
+            anchors: int = sum(1 for d in offsets if abs(d - median) <= band)
+            if anchors >= min_anchors:
+                mappings.append(Mapping(cid, strand, median, median + self.lengths[cid], anchors))
+        mappings.sort(key=lambda m: m.start)
+        return mappings
+
+
+def _flip(strand: str) -> str:
+    return '-' if strand == '+' else '+'
+
+
+def collect_links(index: ContigIndex, long_reads: Iterable[str],
+                  min_anchors: int = 3) -> Dict[Tuple[int, str, int, str], List[int]]:
+    """Gap estimates between consecutive contigs on each long read.
+
+    A link (a, sa, b, sb) means oriented contig a is followed by oriented
+    contig b; it is stored in one canonical direction, since the reverse
+    complement of the read would give (b, flip(sb), a, flip(sa)).
+    """
+    links: Dict[Tuple[int, str, int, str], List[int]] = {}
+    for read in long_reads:
+        prev: Optional[Mapping] = None
+        for m in index.map_read(read, min_anchors):
+            if prev is not None and (m.contig == prev.contig or m.end <= prev.end):
+                continue  # contained in the previous placement
+            if prev is not None:
+                key = (prev.contig, prev.strand, m.contig, m.strand)
+                rev_key = (m.contig, _flip(m.strand), prev.contig, _flip(prev.strand))
+                links.setdefault(min(key, rev_key), []).append(m.start - prev.end)
+            prev = m
+    return links
+
+
+def _join(left: str, right: str, gap: int, min_overlap: int) -> str:
+    """Concatenate two neighbouring contigs, merging a real overlap or padding with Ns."""
+    if gap < 0:
+        # look for an exact overlap near the estimated one
+        longest: int = min(len(left), len(right), -gap + 100)
+        for overlap in range(longest, min_overlap - 1, -1):
+            if left.endswith(right[:overlap]):
+                return left + right[overlap:]
+    return left + 'N' * max(gap, 1) + right
+
+
+def _dedup(contigs: List[str]) -> List[str]:
+    """Drop contigs that are contained, on either strand, in a longer one."""
+    kept: List[str] = []
+    for contig in sorted(contigs, key=len, reverse=True):
+        rc: str = reverse_complement(contig)
+        if not any(contig in other or rc in other for other in kept):
+            kept.append(contig)
+    return kept
+
+
+def _order(contigs: List[str], links: Dict[Tuple[int, str, int, str], List[int]],
+           min_support: int, min_overlap: int) -> List[str]:
+    """Join contigs along their best-supported links into scaffolds.
+
+    Joins are accepted greedily by support as long as each contig end is
+    used once and no cycle forms; gaps are filled with Ns of the median
+    estimated length, or merged when the contigs really overlap. Contigs
+    that are not joined come back as is.
+    """
+    partner: Dict[End, Tuple[End, int]] = {}
+    group: List[int] = list(range(len(contigs)))
+
+    def find(c: int) -> int:
+        while group[c] != c:
+            group[c] = group[group[c]]
+            c = group[c]
+        return c
+
+    for (a, sa, b, sb), gaps in sorted(links.items(), key=lambda item: -len(item[1])):
+        if len(gaps) < min_support or find(a) == find(b):
+            continue
+        exit_end: End = (a, 1 if sa == '+' else 0)
+        entry_end: End = (b, 0 if sb == '+' else 1)
+        if exit_end in partner or entry_end in partner:
+            continue
+        gaps.sort()
+        gap: int = gaps[len(gaps) // 2]
+        partner[exit_end] = (entry_end, gap)
+        partner[entry_end] = (exit_end, gap)
+        group[find(a)] = find(b)
+
+    scaffolds: List[str] = []
+    placed: Set[int] = set()
+    for cid in range(len(contigs)):
+        if cid in placed:
+            continue
+        # walk left to the first contig of this scaffold
+        current: Oriented = (cid, '+')
+        while True:
+            c, strand = current
+            left: End = (c, 0 if strand == '+' else 1)
+            if left not in partner:
+                break
+            (d, side), _ = partner[left]
+            current = (d, '+' if side == 1 else '-')
+        # then spell it left to right
+        c, strand = current
+        seq: str = contigs[c] if strand == '+' else reverse_complement(contigs[c])
+        placed.add(c)
+        while True:
+            right: End = (c, 1 if strand == '+' else 0)
+            if right not in partner:
+                break
+            (c, side), gap = partner[right]
+            strand = '+' if side == 0 else '-'
+            nxt: str = contigs[c] if strand == '+' else reverse_complement(contigs[c])
+            seq = _join(seq, nxt, gap, min_overlap)
+            placed.add(c)
+        scaffolds.append(seq)
+    return scaffolds
+
+
+def scaffold(contigs: List[str], long_reads: Iterable[str], k: int = 15, w: int = 10,
+             min_anchors: int = 3, min_support: int = 2, min_overlap: int = 20) -> List[str]:
+    """Order and orient contigs using long reads, without adding them to the graph.
+
+    Long reads are anchored to the contigs through shared minimizers, and
+    every pair of contigs seen next to each other on at least min_support
+    reads is a candidate join (see _order).
+    """
+    contigs = _dedup(contigs)
+    index: ContigIndex = ContigIndex(contigs, k, w)
+    links = collect_links(index, long_reads, min_anchors)
+    return _order(contigs, links, min_support, min_overlap)
+
+
+class KmerIndex:
+    """Unique k-mers of a contig set on both strands, used to place short reads.
+
+    Each k-mer maps to (contig, strand, position on the oriented contig);
+    k-mers occurring more than once are left out.
+    """
+    k: int
+    lengths: List[int]
+    index: Dict[str, Tuple[int, str, int]]
+
+    def __init__(self, contigs: List[str], k: int = 25) -> None:
+        self.k = k
+        self.lengths = [len(c) for c in contigs]
+        self.index = {}
+        repeats: Set[str] = set()
+        for cid, contig in enumerate(contigs):
+            for strand, seq in (('+', contig), ('-', reverse_complement(contig))):
+                for j in range(len(seq) - k + 1):
+                    kmer: str = seq[j:j + k]
+                    if kmer in self.index:
+                        repeats.add(kmer)
+                    else:
+                        self.index[kmer] = (cid, strand, j)
+        for kmer in repeats:
+            del self.index[kmer]
+
+    def place(self, read: str) -> Optional[Tuple[int, str, int]]:
+        """(contig, strand, where the read starts on the oriented contig), or None.
+
+        Only the first, middle and last k-mer are looked up, so a read costs
+        at most three hash lookups; the first hit wins.
+        """
+        k: int = self.k
+        if len(read) < k:
+            return None
+        for i in (0, (len(read) - k) // 2, len(read) - k):
+            hit: Optional[Tuple[int, str, int]] = self.index.get(read[i:i + k])
+            if hit is not None:
+                return hit[0], hit[1], hit[2] - i
+        return None
+
+
+def collect_pair_links(index: KmerIndex, pairs: Iterable[Tuple[str, str]]
+                       ) -> Tuple[List[Tuple[int, str, int, int, str, int]], List[int]]:
+    """Place read pairs on the contigs.
+
+    Pairs are forward-reverse: read 2 is the reverse complement of the
+    fragment's far end. Returns the pairs whose mates land on different
+    contigs, as (a, strand, bases of the fragment on a, b, strand, bases
+    on b), and the insert sizes of pairs that land on one contig in the
+    expected orientation.
+    """
+    spans: List[Tuple[int, str, int, int, str, int]] = []
+    inserts: List[int] = []
+    for read1, read2 in pairs:
+        first: Optional[Tuple[int, str, int]] = index.place(read1)
+        if first is None:
+            continue
+        second: Optional[Tuple[int, str, int]] = index.place(read2)
+        if second is None:
+            continue
+        a, sa, start1 = first
+        b, s2, start2 = second
+        # the fragment strand of read 2 is the opposite one
+        sb: str = _flip(s2)
+        end2: int = index.lengths[b] - start2
+        if a == b:
+            if sa == sb and end2 > start1:
+                inserts.append(end2 - start1)
+        else:
+            spans.append((a, sa, index.lengths[a] - start1, b, sb, end2))
+    return spans, inserts
+
+
+def insert_size_estimate(inserts: List[int], insert_size: int, insert_sd: float,
+                         min_samples: int = 100) -> Tuple[int, float]:
+    """Median and robust spread (1.4826 MAD) of observed inserts, else the given ones."""
+    if len(inserts) < min_samples:
+        return insert_size, insert_sd
+    inserts = sorted(inserts)
+    median: int = inserts[len(inserts) // 2]
+    deviations: List[int] = sorted(abs(i - median) for i in inserts)
+    return median, 1.4826 * deviations[len(deviations) // 2]
+
+
+def scaffold_pairs(contigs: List[str], pairs: Iterable[Tuple[str, str]], insert_size: int,
+                   insert_sd: float, k: int = 25, min_support: int = 3,
+                   min_overlap: int = 20) -> List[str]:
+    """Order and orient contigs using read pairs that span two of them.
+
+    Mates are placed through a hash index of unique contig k-mers, one pass
+    over the pairs. The insert size distribution is re-estimated from pairs
+    inside a single contig (falling back to insert_size/insert_sd), and a
+    spanning pair whose two sides already exceed mean + 3 sd is dropped;
+    the others give gap = mean - bases on a - bases on b. Contigs are then
+    joined as in _order.
+    """
+    contigs = _dedup(contigs)
+    index: KmerIndex = KmerIndex(contigs, k)
+    spans, inserts = collect_pair_links(index, pairs)
+    mean, sd = insert_size_estimate(inserts, insert_size, insert_sd)
+    links: Dict[Tuple[int, str, int, str], List[int]] = {}
+    for a, sa, on_a, b, sb, on_b in spans:
+        if on_a + on_b > mean + 3 * sd:
+            continue
+        key = (a, sa, b, sb)
+        rev_key = (b, _flip(sb), a, _flip(sa))
+        links.setdefault(min(key, rev_key), []).append(mean - on_a - on_b)
+    return _order(contigs, links, min_support, min_overlap)
@@ -0,0 +1,98 @@
+"""Shared sequence operations: reverse complement, validation and 2-bit encoding.
+
+Complements follow the IUPAC codes (N stays N, R <-> Y, K <-> M, ...) and
+keep case. The 2-bit code is A=0, C=1, G=2, T=3 with the first base in the
+high bits, as in dbg_kmer_as_int and the read store.
+
+This module is Python-only (str.translate, lazy NumPy); dbg_kmer_as_key,
+which main.codon.py compiles, keeps its own reverse complement.
+"""
+from typing import Any, Dict, List, Optional
+
+IUPAC_COMPLEMENT: Dict[str, str] = {
+    'A': 'T', 'C': 'G', 'G': 'C', 'T': 'A', 'U': 'A',
+    'R': 'Y', 'Y': 'R', 'S': 'S', 'W': 'W', 'K': 'M', 'M': 'K',
+    'B': 'V', 'V': 'B', 'D': 'H', 'H': 'D', 'N': 'N',
+}
+IUPAC: str = ''.join(IUPAC_COMPLEMENT)
+
+_RC_TABLE = str.maketrans(IUPAC + IUPAC.lower(),
+                          ''.join(IUPAC_COMPLEMENT.values()) + ''.join(IUPAC_COMPLEMENT.values()).lower())
+_NOT_ACGT = str.maketrans('', '', 'ACGT')
+_NOT_IUPAC = str.maketrans('', '', IUPAC + IUPAC.lower())
+_TO_DIGITS = str.maketrans('ACGT', '0123')
+_COMPLEMENT_ARRAY: Optional[Any] = None
+# byte -> the four bases it packs, first base in the high bits
+_UNPACK: List[str] = [''.join('ACGT'[(b >> s) & 3] for s in (6, 4, 2, 0)) for b in range(256)]
+
+
+def reverse_complement(seq: str) -> str:
+    """IUPAC-aware reverse complement; characters outside IUPAC are kept as is."""
+    return seq[::-1].translate(_RC_TABLE)
+
+
+def is_acgt(seq: str) -> bool:
+    """True if seq holds only upper-case A, C, G and T."""
+    return not seq.translate(_NOT_ACGT)
+
+
+def validate(seq: str, strict: bool = True) -> str:
+    """Return seq, or raise ValueError if it holds anything but ACGT (strict) or IUPAC codes."""
+    rest: str = seq.translate(_NOT_ACGT if strict else _NOT_IUPAC)
+    if rest:
+        raise ValueError(f"unexpected base {rest[0]!r} in sequence")
+    return seq
+
+
+def normalize(seq: str) -> str:
+    """Upper-case seq (soft-masked bases become ordinary ones)."""
+    return seq.upper()
+
+
+def encode_2bit(seq: str) -> int:
+    """2-bit code of an ACGT sequence; raises ValueError on other characters."""
+    return int(seq.translate(_TO_DIGITS), 4) if seq else 0
+
+
+def decode_2bit(code: int, length: int) -> str:
+    """Inverse of encode_2bit for a sequence of the given length."""
+    n_bytes: int = (length + 3) // 4
+    # left-align so the first base sits in the high bits of the first byte
+    packed: bytes = (code << (2 * (4 * n_bytes - length))).to_bytes(n_bytes, 'big')
+    return ''.join([_UNPACK[b] for b in packed])[:length]
+
+
+def pack_2bit(seq: str) -> bytes:
+    """seq packed four bases per byte, zero-padded at the end."""
+    validate(seq)
+    digits: str = seq.translate(_TO_DIGITS)
+    digits += '0' * (-len(digits) % 4)
+    return int(digits, 4).to_bytes(len(digits) // 4, 'big') if digits else b''
+
+
+def reverse_complement_batch(seqs: List[str]) -> List[str]:
+    """Reverse complements of many sequences with one NumPy table lookup.
+
+    The sequences are joined, complemented and reversed as a single
+    array, which turns n small translate calls into a few large
+    vectorized ones; NumPy is only needed when this is called.
+    """
+    import numpy as np
+    global _COMPLEMENT_ARRAY
+    if not seqs:
+        return []
+    if _COMPLEMENT_ARRAY is None:
+        # the byte-level equivalent of _RC_TABLE
+        _COMPLEMENT_ARRAY = np.frombuffer(bytes(range(256)).decode('latin-1').translate(_RC_TABLE)
+                                          .encode('latin-1'), dtype=np.uint8)
+    table: np.ndarray = _COMPLEMENT_ARRAY
+    joined: np.ndarray = np.frombuffer(''.join(seqs).encode('ascii'), dtype=np.uint8)
+    flipped: str = table[joined[::-1]].tobytes().decode('ascii')
+    # reversing the concatenation also reverses the order of the sequences
+    out: List[str] = []
+    end: int = len(flipped)
+    for seq in seqs:
+        start: int = end - len(seq)
+        out.append(flipped[start:end])
+        end = start
+    return out
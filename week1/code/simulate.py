@@ -0,0 +1,234 @@
+"""Simulate datasets with the read profile of a bundled param.json.
+
+Writes short_1.fasta / short_2.fasta (paired reads) and long.fasta in the
+same layout as data1..data4, plus the genome used (genome.fasta) and a
+param.json describing the run:
+
+    python simulate.py ../data/data4/param.json /tmp/sim --genome-size 3000000
+    python simulate.py ../data/data4/param.json /tmp/sim --scale 100
+"""
+from typing import Any, BinaryIO, Dict, Iterator, Tuple
+import argparse
+import json
+import os
+
+import numpy as np
+
+from utils import discover_reads, iter_reads
+
+_ASCII: np.ndarray = np.frombuffer(b'ACGT', dtype=np.uint8)
+_CODES: np.ndarray = np.full(256, 255, dtype=np.uint8)
+_CODES[_ASCII] = np.arange(4, dtype=np.uint8)
+CHUNK: int = 100000
+# long reads are simulated in chunks of about this many bases
+LONG_CHUNK_BASES: int = 1 << 23
+
+
+class ReadProfile:
+    """Read lengths, insert size and error rates, as given by a dataset's param.json."""
+    short_read_length: int
+    pair_distance: int
+    standard_deviation: float
+    short_error_rate: float
+    long_read_length: int
+    long_error_rate: float
+
+    def __init__(self, params: Dict[str, Any]) -> None:
+        self.short_read_length = int(params.get("short_read_length", 100))
+        self.pair_distance = int(params.get("pair_distance", 500))
+        self.standard_deviation = float(params.get("standard_deviation", 0))
+        # the bundled files spell it "eoor"
+        self.short_error_rate = float(params.get("short_read_error_rate",
+                                                 params.get("short_read_eoor_rate", 0)))
+        self.long_read_length = int(params.get("long_read_length", 0))
+        self.long_error_rate = float(params.get("long_read_error_rate", 0))
+
+    @classmethod
+    def load(cls, path: str) -> 'ReadProfile':
+        with open(path) as f:
+            return cls(json.load(f))
+
+
+def random_genome(size: int, rng: np.random.Generator) -> np.ndarray:
+    return rng.integers(0, 4, size, dtype=np.uint8)
+
+
+def load_genome(path: str, rng: np.random.Generator) -> np.ndarray:
+    """2-bit codes of all records in a FASTA file; non-ACGT bases become random ones."""
+    seq: bytes = ''.join(iter_reads(path)).upper().encode('ascii')
+    codes: np.ndarray = _CODES[np.frombuffer(seq, dtype=np.uint8)]
+    unknown: np.ndarray = codes == 255
+    codes[unknown] = rng.integers(0, 4, int(unknown.sum()), dtype=np.uint8)
+    return codes
+
+
+def _reverse_complement(codes: np.ndarray) -> np.ndarray:
+    return 3 - codes[..., ::-1]
+
+
+def _substitute(reads: np.ndarray, rate: float, rng: np.random.Generator) -> np.ndarray:
+    """Replace each base with probability rate by one of the three other bases."""
+    hits: np.ndarray = rng.random(reads.shape) < rate
+    shift: np.ndarray = rng.integers(1, 4, int(hits.sum()), dtype=np.uint8)
+    reads[hits] = (reads[hits] + shift) % 4
+    return reads
+
+
+def short_pairs(genome: np.ndarray, n_pairs: int, profile: ReadProfile,
+                rng: np.random.Generator) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Yield (read 1, read 2) code matrices, CHUNK pairs at a time.
+
+    Fragment lengths are drawn from N(pair_distance, standard_deviation);
+    read 1 is the fragment's first bases and read 2 the reverse complement
+    of its last ones. Half of the fragments come from the reverse strand.
+    """
+    length: int = profile.short_read_length
+    rc_genome: np.ndarray = _reverse_complement(genome)
+    offsets: np.ndarray = np.arange(length)
+    for done in range(0, n_pairs, CHUNK):
+        n: int = min(CHUNK, n_pairs - done)
+        fragment: np.ndarray = np.rint(rng.normal(profile.pair_distance, profile.standard_deviation, n))
+        fragment = np.clip(fragment, length, len(genome)).astype(np.int64)
+        start: np.ndarray = (rng.random(n) * (len(genome) - fragment + 1)).astype(np.int64)
+        reverse: np.ndarray = rng.random(n) < 0.5
+        first: np.ndarray = np.where(reverse[:, None], rc_genome[start[:, None] + offsets],
+                                     genome[start[:, None] + offsets])
+        end: np.ndarray = (start + fragment - length)[:, None] + offsets
+        second: np.ndarray = _reverse_complement(np.where(reverse[:, None], rc_genome[end], genome[end]))
+        yield (_substitute(first, profile.short_error_rate, rng),
+               _substitute(second, profile.short_error_rate, rng))
+
+
+def long_reads(genome: np.ndarray, n_reads: int, profile: ReadProfile,
+               rng: np.random.Generator) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Yield noisy long reads as (concatenated codes, read lengths), about LONG_CHUNK_BASES at a time.
+
+    Errors are half substitutions, a quarter each insertions and deletions.
+    Half of the reads come from the reverse strand.
+    """
+    length: int = min(profile.long_read_length, len(genome))
+    rate: float = profile.long_error_rate
+    rc_genome: np.ndarray = _reverse_complement(genome)
+    offsets: np.ndarray = np.arange(length)
+    chunk: int = max(1, LONG_CHUNK_BASES // max(length, 1))
+    for done in range(0, n_reads, chunk):
+        n: int = min(chunk, n_reads - done)
+        start: np.ndarray = rng.integers(0, len(genome) - length + 1, n)
+        reverse: np.ndarray = rng.random(n) < 0.5
+        reads: np.ndarray = genome[start[:, None] + offsets]
+        # the reverse complement of genome[s:s + length] starts at len - s - length in rc_genome
+        rc_start: np.ndarray = len(genome) - length - start[reverse]
+        reads[reverse] = rc_genome[rc_start[:, None] + offsets]
+        codes: np.ndarray = reads.ravel()
+        event: np.ndarray = rng.random(codes.shape)
+        substituted: np.ndarray = event < rate / 2
+        codes[substituted] = (codes[substituted]
+                              + rng.integers(1, 4, int(substituted.sum()), dtype=np.uint8)) % 4
+        kept: np.ndarray = substituted | (event >= rate * 3 / 4)
+        inserted: np.ndarray = np.flatnonzero((event >= rate * 3 / 4) & (event < rate))
+        lengths: np.ndarray = (kept.reshape(n, length).sum(axis=1)
+                               + np.bincount(inserted // length, minlength=n))
+        # an inserted base goes in front of its position and is always kept
+        codes = np.insert(codes, inserted, rng.integers(0, 4, len(inserted), dtype=np.uint8))
+        kept = np.insert(kept, inserted, True)
+        yield codes[kept], lengths
+
+
+def decode(codes: np.ndarray) -> str:
+    """ACGT text of a code array; rows of a matrix are concatenated."""
+    return _ASCII[codes].tobytes().decode('ascii')
+
+
+def write_fasta(out: BinaryIO, reads: np.ndarray, prefix: str, first_id: int, suffix: str) -> None:
+    """Write a code matrix as '>prefix_<id><suffix>' records, one sequence line each."""
+    ascii_reads: bytes = _ASCII[reads].tobytes()
+    width: int = reads.shape[1]
+    out.write(b''.join(b'>%s_%d%s\n%s\n' % (prefix.encode(), first_id + i, suffix.encode(),
+                                            ascii_reads[i * width:(i + 1) * width])
+                       for i in range(reads.shape[0])))
+
+
+def write_ragged_fasta(out: BinaryIO, codes: np.ndarray, lengths: np.ndarray, prefix: str,
+                       first_id: int, suffix: str) -> None:
+    """Like write_fasta, for reads of the given lengths concatenated in codes."""
+    ascii_reads: bytes = _ASCII[codes].tobytes()
+    ends: np.ndarray = np.cumsum(lengths)
+    out.write(b''.join(b'>%s_%d%s\n%s\n' % (prefix.encode(), first_id + i, suffix.encode(),
+                                            ascii_reads[end - n:end])
+                       for i, (n, end) in enumerate(zip(lengths.tolist(), ends.tolist()))))
+
+
+def simulate(profile: ReadProfile, out_dir: str, genome: np.ndarray, short_coverage: float,
+             long_coverage: float, rng: np.random.Generator) -> Dict[str, int]:
+    """Write a simulated dataset to out_dir; returns the number of reads per file."""
+    os.makedirs(out_dir, exist_ok=True)
+    n_pairs: int = int(len(genome) * short_coverage / (2 * profile.short_read_length))
+    with open(f"{out_dir}/short_1.fasta", "wb") as out1, open(f"{out_dir}/short_2.fasta", "wb") as out2:
+        written: int = 0
+        for first, second in short_pairs(genome, n_pairs, profile, rng):
+            write_fasta(out1, first, "short_read", written, "/1")
+            write_fasta(out2, second, "short_read", written, "/2")
+            written += len(first)
+    counts: Dict[str, int] = {"short_1.fasta": n_pairs, "short_2.fasta": n_pairs}
+    if profile.long_read_length and long_coverage > 0:
+        n_long: int = int(len(genome) * long_coverage / profile.long_read_length)
+        with open(f"{out_dir}/long.fasta", "wb") as out:
+            written = 0
+            for codes, lengths in long_reads(genome, n_long, profile, rng):
+                write_ragged_fasta(out, codes, lengths, "long_read", written, "/1")
+                written += len(lengths)
+        counts["long.fasta"] = n_long
+    with open(f"{out_dir}/genome.fasta", "wb") as out:
+        out.write(b'>genome\n' + _ASCII[genome].tobytes() + b'\n')
+    return counts
+
+
+def scaled_genome_size(param_path: str, scale: float, profile: ReadProfile,
+                       short_coverage: float) -> int:
+    """Genome length giving scale times the short-read bases of the dataset next to param_path."""
+    path: str = os.path.dirname(param_path) or "."
+    libraries: Dict[str, str] = discover_reads(path)
+    if "short_1" not in libraries:
+        raise FileNotFoundError(f"no short_1 reads next to {param_path} to scale from")
+    n_pairs: int = sum(1 for _ in iter_reads(f"{path}/{libraries['short_1']}"))
+    return int(scale * n_pairs * 2 * profile.short_read_length / short_coverage)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulate reads with a dataset's param.json profile.")
+    parser.add_argument("param", help="param.json of the dataset to imitate")
+    parser.add_argument("out_dir")
+    parser.add_argument("--genome", help="FASTA genome to sample from (default: random)")
+    parser.add_argument("--genome-size", type=int, default=100000,
+                        help="length of the random genome (default: 100000)")
+    parser.add_argument("--scale", type=float,
+                        help="size the random genome so the short reads are SCALE times "
+                             "those of the dataset next to param (e.g. 100)")
+    parser.add_argument("--short-coverage", type=float, default=30.0)
+    parser.add_argument("--long-coverage", type=float, default=5.0,
+                        help="0 leaves out long.fasta, like data4")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    profile: ReadProfile = ReadProfile.load(args.param)
+    rng: np.random.Generator = np.random.default_rng(args.seed)
+    if args.genome:
+        genome: np.ndarray = load_genome(args.genome, rng)
+    else:
+        size: int = args.genome_size
+        if args.scale:
+            size = scaled_genome_size(args.param, args.scale, profile, args.short_coverage)
+        genome = random_genome(size, rng)
+    counts = simulate(profile, args.out_dir, genome, args.short_coverage, args.long_coverage, rng)
+    with open(args.param) as f:
+        params: Dict[str, Any] = json.load(f)
+    params.update(name=os.path.basename(os.path.normpath(args.out_dir)), genome_size=len(genome),
+                  short_coverage=args.short_coverage, long_coverage=args.long_coverage, seed=args.seed)
+    with open(f"{args.out_dir}/param.json", "w") as f:
+        json.dump(params, f, indent=1)
+    for name, n in counts.items():
+        print(name, n)
+
+
+if __name__ == "__main__":
+    main()
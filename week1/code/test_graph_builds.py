@@ -0,0 +1,220 @@
+"""Every alternative graph builder must reproduce the serial dbg_kmer_as_int build,
+and incremental contig extraction must match recomputing all depths per contig.
+
+Contigs depend on node order and on the order of children within a node
+(ties in count keep it), so graphs are compared on both, not just as sets.
+Parents are only ever counted, unioned or maxed over, and snapshots
+rebuild them grouped by source node, so they are compared as sets.
+Graph simplification and pair scaffolding are checked on small hand-made
+cases.
+"""
+import random
+from typing import List
+
+import pytest
+
+import dbg_array
+import dbg_canonical
+import dbg_kmer_as_key
+from dbg_kmer_as_int import DBG
+from kmer_count import count_kmers
+from parallel_build import build_parallel
+from profiling import StageTimer
+from read_store import open_store
+from scaffold import _order, scaffold_pairs
+from seqops import reverse_complement
+
+K: int = 11
+SEEDS: List[int] = list(range(8))
+
+
+def random_reads(seed: int) -> List[List[str]]:
+    """Short and long reads, with errors, from a small genome holding a repeat."""
+    rng = random.Random(seed)
+    unit: str = ''.join(rng.choice('ACGT') for _ in range(40))
+    genome: str = ''.join(rng.choice('ACGT') for _ in range(rng.randint(200, 600)))
+    genome = genome[:100] + unit + genome[100:300] + unit + genome[300:]
+
+    def sample(length: int, n: int) -> List[str]:
+        reads: List[str] = []
+        for _ in range(n):
+            start: int = rng.randint(0, len(genome) - length)
+            read: List[str] = list(genome[start:start + length])
+            for i in range(len(read)):
+                if rng.random() < 0.01:
+                    read[i] = rng.choice('ACGT')
+            reads.append(''.join(read))
+        return reads
+
+    # reads of exactly K bases have no arcs and must be skipped everywhere
+    return [sample(30, 150), sample(30, 150) + ['A' * K], sample(150, 10)]
+
+
+def tandem_reads(seed: int) -> List[List[str]]:
+    """Error-free reads of a genome full of tandem repeats, so the graph has many cycles."""
+    rng = random.Random(seed)
+    unit: str = ''.join(rng.choice('ACGT') for _ in range(rng.choice([rng.randint(2, 10),
+                                                                        rng.randint(11, 30)])))
+    parts: List[str] = []
+    for _ in range(rng.randint(3, 6)):
+        parts.append(''.join(rng.choice('ACGT') for _ in range(rng.randint(20, 120))))
+        parts.append(unit * rng.randint(1, 3))
+    genome: str = ''.join(parts)
+    starts: List[int] = [rng.randint(0, len(genome) - 30) for _ in range(len(genome) // 4)]
+    return [[genome[start:start + 30] for start in starts]]
+
+
+def assert_same_graph(actual: DBG, expected: DBG) -> None:
+    assert actual.k == expected.k
+    assert actual.compacted == expected.compacted
+    assert list(actual.nodes) == list(expected.nodes)
+    for kmer, node in expected.nodes.items():
+        other = actual.nodes[kmer]
+        assert other.get_count() == node.get_count()
+        assert other.get_children() == node.get_children()
+        assert set(other.get_parents()) == set(node.get_parents())
+        assert (other.length, other.coverage, other.seq) == (node.length, node.coverage, node.seq)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_from_counts(seed: int) -> None:
+    data_list = random_reads(seed)
+    # tiny batches so counting merges many tables
+    kmers, counts, edges = count_kmers(data_list, K, batch_bases=500)
+    dbg = DBG.from_counts(K, kmers.tolist(), counts.tolist(), edges.tolist())
+    assert_same_graph(dbg, DBG(K, data_list))
+
+
+@pytest.mark.parametrize("seed", SEEDS[:3])
+def test_build_parallel(seed: int) -> None:
+    data_list = random_reads(seed)
+    dbg = build_parallel(data_list, K, workers=2, shards=3, chunk_size=37)
+    assert_same_graph(dbg, DBG(K, data_list))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_read_store(seed: int, tmp_path) -> None:
+    data_list = random_reads(seed)
+    stores = []
+    for i, reads in enumerate(data_list):
+        with open(tmp_path / f"reads_{i}.fasta", "w") as f:
+            f.writelines(f">read_{j}\n{read}\n" for j, read in enumerate(reads))
+        stores.append(open_store(str(tmp_path), f"reads_{i}.fasta"))
+    try:
+        assert_same_graph(DBG(K, stores), DBG(K, data_list))
+    finally:
+        for store in stores:
+            store.close()
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("compacted", [False, True])
+def test_snapshot_round_trip(seed: int, compacted: bool, tmp_path) -> None:
+    dbg = DBG(K, random_reads(seed))
+    if compacted:
+        dbg.compact()
+    path = str(tmp_path / "graph.dbg")
+    dbg.save(path)
+    loaded = DBG.load(path)
+    assert_same_graph(loaded, dbg)
+    assert loaded.get_top_contigs(5) == dbg.get_top_contigs(5)
+
+
+def full_reset_contigs(dbg, n: int) -> List[str]:
+    """The longest contigs with every depth recomputed from scratch each time."""
+    contigs: List[str] = []
+    for _ in range(n):
+        dbg._reset()
+        path = dbg._get_longest_path()
+        if not path:
+            break
+        contigs.append(dbg._concat_path(path))
+        dbg._delete_path(path)
+    return contigs
+
+
+@pytest.mark.parametrize("seed", [0, 280] + SEEDS[1:])
+@pytest.mark.parametrize("engine, compact", [(dbg_kmer_as_key.DBG, False), (DBG, True),
+                                             (dbg_array.DBG, False)])
+def test_incremental_depths_on_cycles(seed: int, engine, compact: bool) -> None:
+    data_list = tandem_reads(seed)
+    expected = engine(K, data_list)
+    actual = engine(K, data_list)
+    if compact:
+        expected.compact()
+        actual.compact()
+    assert actual.get_top_contigs(60) == full_reset_contigs(expected, 60)
+
+
+@pytest.mark.parametrize("engine", [dbg_kmer_as_key.DBG, DBG, dbg_array.DBG, dbg_canonical.DBG])
+def test_timed_top_contigs(engine) -> None:
+    data_list = random_reads(0)
+    timer = StageTimer()
+    assert list(engine(K, data_list).iter_top_contigs(5, timer)) == engine(K, data_list).get_top_contigs(5)
+    assert timer.stages["contig.path"].calls == 5
+    assert {"contig.reset", "contig.depth", "contig.delete"} <= set(timer.stages)
+
+
+def genome_reads(seed: int, copies: int = 5) -> List[str]:
+    """A random 200 bp genome with no k-mer repeated on either strand, read copies times."""
+    rng = random.Random(seed)
+    while True:
+        genome: str = ''.join(rng.choice('ACGT') for _ in range(200))
+        kmers: List[str] = [seq[i:i + K] for seq in (genome, reverse_complement(genome))
+                            for i in range(len(seq) - K + 1)]
+        if len(set(kmers)) == len(kmers):
+            return [genome] * copies
+
+
+def mutate(seq: str, i: int) -> str:
+    return seq[:i] + {'A': 'C', 'C': 'G', 'G': 'T', 'T': 'A'}[seq[i]] + seq[i + 1:]
+
+
+def assert_simplifies_to_genome(engine, reads: List[str], tips: int, bubbles: int) -> None:
+    genome: str = reads[0]
+    dbg = engine(K, [reads])
+    stats = dbg.simplify()
+    assert (stats["tips"], stats["bubbles"]) == (tips, bubbles)
+    # one unitig per strand is all that is left
+    assert set(dbg.get_top_contigs(3)) == {genome, reverse_complement(genome)}
+
+
+@pytest.mark.parametrize("engine", [dbg_kmer_as_key.DBG, DBG])
+def test_simplify_clips_tip(engine) -> None:
+    reads: List[str] = genome_reads(0)
+    # an error in the last base of a read leaves a one k-mer dead end on each strand
+    reads.append(mutate(reads[0][50:80], 29))
+    assert len(engine(K, [reads]).get_top_contigs(3)) > 2
+    assert_simplifies_to_genome(engine, reads, tips=2, bubbles=0)
+
+
+@pytest.mark.parametrize("engine", [dbg_kmer_as_key.DBG, DBG])
+def test_simplify_pops_bubble(engine) -> None:
+    reads: List[str] = genome_reads(0)
+    # an error inside a read gives a K k-mer detour rejoining the genome on each strand
+    reads.append(mutate(reads[0][100:160], 30))
+    assert len(engine(K, [reads]).get_top_contigs(3)) > 2
+    assert_simplifies_to_genome(engine, reads, tips=0, bubbles=2)
+
+
+def test_scaffold_pairs_joins_with_gap() -> None:
+    rng = random.Random(0)
+    genome: str = ''.join(rng.choice('ACGT') for _ in range(1800))
+    # 100 bases apart, the second contig on the other strand
+    contigs: List[str] = [genome[:800], reverse_complement(genome[900:1700])]
+    # forward-reverse pairs of 300 bp fragments tiling the genome
+    fragments: List[str] = [genome[i:i + 300] for i in range(0, len(genome) - 300, 5)]
+    pairs = [(f[:50], reverse_complement(f[-50:])) for f in fragments]
+    scaffolds: List[str] = scaffold_pairs(contigs, pairs, insert_size=300, insert_sd=10)
+    assert scaffolds == [genome[:800] + 'N' * 100 + genome[900:1700]]
+
+
+def test_order_rejects_conflicting_links() -> None:
+    contigs: List[str] = ['AAAAC', 'CCCCA', 'GGGGT']
+    links = {(0, '+', 1, '+'): [10] * 5,
+             # the end of contig 0 is taken by the better-supported join
+             (0, '+', 2, '+'): [20] * 4,
+             # and 1 -> 0 would close a cycle
+             (1, '+', 0, '+'): [30] * 3}
+    scaffolds: List[str] = _order(contigs, links, min_support=2, min_overlap=20)
+    assert scaffolds == ['AAAAC' + 'N' * 10 + 'CCCCA', 'GGGGT']
@@ -1,27 +1,141 @@
-from typing import List
+from typing import Dict, Iterator, List, TextIO
+import gzip
+import os
+
+from seqops import normalize
+
+GZIP_MAGIC: bytes = b'\x1f\x8b'
+# read libraries a dataset may provide, in graph insertion order; only
+# short reads are needed, paired and long libraries are optional
+READ_LIBRARIES: List[str] = ["short_1", "short_2", "long"]
+READ_SUFFIXES: List[str] = [".fasta", ".fa", ".fastq", ".fq",
+                            ".fasta.gz", ".fa.gz", ".fastq.gz", ".fq.gz"]
+
+
+def open_text(full_path: str) -> TextIO:
+    """Open a plain or gzip-compressed text file for reading."""
+    with open(full_path, "rb") as f:
+        magic: bytes = f.read(2)
+    if magic == GZIP_MAGIC:
+        return gzip.open(full_path, "rt")
+    return open(full_path, "r")
+
+
+def iter_fasta(f: TextIO) -> Iterator[str]:
+    parts: List[str] = []
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith(">"):
+            if parts:
+                yield normalize(''.join(parts))
+                parts = []
+        else:
+            parts.append(line)
+    if parts:
+        yield normalize(''.join(parts))
+
+
+def iter_fastq(f: TextIO) -> Iterator[str]:
+    lines = (line.strip() for line in f)
+    for header in lines:
+        if not header:
+            continue
+        parts: List[str] = []
+        for line in lines:
+            if line.startswith("+"):
+                break
+            parts.append(line)
+        seq: str = ''.join(parts)
+        # quality may be wrapped too; skip until it covers the sequence
+        qual_len: int = 0
+        while qual_len < len(seq):
+            try:
+                qual_len += len(next(lines))
+            except StopIteration:
+                raise ValueError(f"truncated FASTQ record in {getattr(f, 'name', f)}") from None
+        yield normalize(seq)
+
+
+def iter_reads(full_path: str) -> Iterator[str]:
+    """Yield the sequences of a FASTA or FASTQ file (optionally gzipped) one at a time.
+
+    Sequences are upper-cased, so soft-masked input reads like any other.
+    """
+    with open_text(full_path) as f:
+        first: str = f.read(1)
+        f.seek(0)
+        if first == "@":
+            yield from iter_fastq(f)
+        else:
+            yield from iter_fasta(f)
+
+
+def iter_batches(reads: Iterator[str], batch_size: int) -> Iterator[List[str]]:
+    """Group a read stream into lists of at most batch_size reads."""
+    batch: List[str] = []
+    for read in reads:
+        batch.append(read)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_base_batches(reads: Iterator[str], max_bases: int) -> Iterator[List[str]]:
+    """Group a read stream into lists of about max_bases bases.
+
+    Reads are never split; a batch closes once it reaches max_bases, so
+    it overshoots by less than one read.
+    """
+    batch: List[str] = []
+    size: int = 0
+    for read in reads:
+        batch.append(read)
+        size += len(read)
+        if size >= max_bases:
+            yield batch
+            batch, size = [], 0
+    if batch:
+        yield batch
+
+
+class ReadStream:
+    """Re-iterable view of a read file; every iteration re-reads it from disk.
+
+    DBG engines accept these in place of read lists, so only the graph is
+    held in memory, and two-pass builders can iterate more than once.
+    """
+    full_path: str
+
+    def __init__(self, path: str, name: str) -> None:
+        self.full_path = path + "/" + name
+
+    def __iter__(self) -> Iterator[str]:
+        return iter_reads(self.full_path)
+
 
 def read_fasta(path: str, name: str) -> List[str]:
-    data: List[str] = []
-    seq: str = ""
-    full_path: str = path + "/" + name  
-    with open(full_path, "r") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            if line.startswith(">"):
-                if seq:
-                    data.append(seq)
-                    seq = ""
-            else:
-                seq += line
-        if seq:
-            data.append(seq)
+    data: List[str] = list(iter_reads(path + "/" + name))
     print(name, len(data), len(data[0]) if data else 0)
     return data
 
-def read_data(path: str) -> List[List[str]]:
-    short1 = read_fasta(path, "short_1.fasta")
-    short2 = read_fasta(path, "short_2.fasta")
-    long1 = read_fasta(path, "long.fasta")
-    return [short1, short2, long1]
+
+def discover_reads(path: str) -> Dict[str, str]:
+    """Map each read library present in path to its file name.
+
+    Libraries missing from the dataset are left out; a dataset without
+    any reads is an error.
+    """
+    found: Dict[str, str] = {}
+    for library in READ_LIBRARIES:
+        for suffix in READ_SUFFIXES:
+            if os.path.exists(path + "/" + library + suffix):
+                found[library] = library + suffix
+                break
+    if not found:
+        raise FileNotFoundError(f"no read files in {path}")
+    return found
+
@@ -0,0 +1,82 @@
+from typing import Any, List, Optional, TextIO, Tuple
+import gzip
+
+BUFFER_SIZE: int = 1 << 20
+
+
+class BufferedWriter:
+    """Text output collected in memory and written in large joined chunks.
+
+    Paths ending in .gz are gzip-compressed (level 1, favouring speed).
+    """
+    out: TextIO
+    buffer_size: int
+    _parts: List[str]
+    _size: int
+
+    def __init__(self, path: str, buffer_size: int = BUFFER_SIZE) -> None:
+        self.out = gzip.open(path, "wt", compresslevel=1) if path.endswith(".gz") else open(path, "w")
+        self.buffer_size = buffer_size
+        self._parts = []
+        self._size = 0
+
+    def write(self, text: str) -> None:
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._parts:
+            self.out.write(''.join(self._parts))
+            self._parts = []
+            self._size = 0
+
+    def close(self) -> None:
+        self.flush()
+        self.out.close()
+
+    def __enter__(self) -> 'BufferedWriter':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class FastaWriter(BufferedWriter):
+    """FASTA records, one unwrapped sequence line each, as in the read files."""
+    records: int
+
+    def __init__(self, path: str, buffer_size: int = BUFFER_SIZE) -> None:
+        super().__init__(path, buffer_size)
+        self.records = 0
+
+    def add(self, seq: str, name: Optional[str] = None) -> None:
+        """Append seq as '>name' (default: contig_<n> len=<length>)."""
+        if name is None:
+            name = f"contig_{self.records} len={len(seq)}"
+        self.write(f">{name}\n{seq}\n")
+        self.records += 1
+
+
+def write_gfa(dbg: Any, path: str, k: int, buffer_size: int = BUFFER_SIZE) -> Tuple[int, int]:
+    """Write dbg's nodes and edges as GFA 1; returns (segments, links).
+
+    dbg must provide gfa_segments(). Segments carry their length (LN),
+    k-mer count (KC) and mean k-mer coverage (DP); links overlap by k - 1.
+    """
+    segments: int = 0
+    links: int = 0
+    with BufferedWriter(path, buffer_size) as out:
+        out.write("H\tVN:Z:1.0\n")
+        overlap: str = f"{k - 1}M"
+        for sid, seq, coverage, children in dbg.gfa_segments():
+            # a unitig of length L spells L + k - 1 bases
+            kmers: int = len(seq) - k + 1
+            out.write(f"S\t{sid}\t{seq}\tLN:i:{len(seq)}\tKC:i:{round(coverage * kmers)}"
+                      f"\tDP:f:{coverage:.2f}\n")
+            for child in children:
+                out.write(f"L\t{sid}\t+\t{child}\t+\t{overlap}\n")
+            segments += 1
+            links += len(children)
+    return segments, links